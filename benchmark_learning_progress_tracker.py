@@ -0,0 +1,492 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import learning_progress_tracker
+from learning_progress_tracker import (COURSES, CourseColumns, CourseManager, KeyedHashIdAllocator,
+                                       ShardedStudentManager, Student, StudentManager, TextSink, TrackerService,
+                                       validate_many)
+
+# Share of the submissions going to each course, skewed towards the first courses like real rosters
+COURSE_WEIGHTS = (0.55, 0.25, 0.15, 0.05)
+FIRST_NAMES = ('John', 'Jane', 'Anne-Marie', 'Mary', 'Jean-Claude', "D'Arcy")
+LAST_NAMES = ('Doe', 'Smith', "O'Connor", 'van Dijk', 'Smith-Jones', 'Nguyen')
+STATISTICS = ('most_popular_course', 'least_popular_course', 'highest_activity_course',
+              'lowest_activity_course', 'easiest_course', 'hardest_course')
+
+
+class LegacyStudent:
+    def __init__(self, first_name: str, last_name: str, email: str) -> None:
+        """Dict-based student layout used before the columnar storage, kept for memory comparisons."""
+        self.first_name = first_name
+        self.last_name = last_name
+        self.email = email
+        self.student_id = abs(hash(email))
+        self.progress = {'Python': 0, 'DSA': 0, 'Databases': 0, 'Flask': 0}
+        self.submissions = {'Python': 0, 'DSA': 0, 'Databases': 0, 'Flask': 0}
+        self.completed_courses = {'Python': False, 'DSA': False, 'Databases': False, 'Flask': False}
+        self.notifications_sent = {'Python': False, 'DSA': False, 'Databases': False, 'Flask': False}
+
+
+def build_roster(size: int) -> StudentManager:
+    """Create a student manager holding `size` synthetic students."""
+    manager = StudentManager()
+    for i in range(size):
+        manager.add_student('John', 'Doe', f'student{i}@example.com')
+    return manager
+
+
+def bench_find_student_by_id(size: int, lookups: int = 100_000) -> float:
+    """Return the average cost of one id lookup in nanoseconds for a roster of `size` students."""
+    manager = build_roster(size)
+    ids = [student.student_id for student in manager.students]
+    sample = [random.choice(ids) for _ in range(lookups)]
+    find = manager.find_student_by_id
+    start = time.perf_counter()
+    for student_id in sample:
+        find(student_id)
+    elapsed = time.perf_counter() - start
+    return elapsed / lookups * 1e9
+
+
+def legacy_validate(first_name: str, last_name: str, email: str) -> Optional[str]:
+    """Validation as done before the compiled validators: a Student is built first and every
+    check passes a raw pattern string to re.fullmatch."""
+    LegacyStudent(first_name, last_name, email)
+    if not (re.fullmatch(r"[A-Za-z]+(['-][A-Za-z]+)*", first_name) and len(first_name) > 1
+            and all(len(part) > 1 for part in first_name.split(" "))):
+        return 'Incorrect first name.'
+    if not (re.fullmatch(r"[A-Za-z]+([' -][A-Za-z]+)*", last_name) and len(last_name) > 1
+            and all(len(part) > 1 for part in last_name.split(" "))):
+        return 'Incorrect last name.'
+    if re.fullmatch(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z0-9]{1,}", email) is None:
+        return 'Incorrect email.'
+    return None
+
+
+def mixed_credential_rows(size: int, seed: int = 0) -> List[Tuple[str, str, str]]:
+    """Return `size` credential rows of which roughly half are invalid in one field."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        first_name, last_name, email = 'Anne-Marie', "O'Connor Smith", f'student{i}@example.com'
+        kind = rng.random()
+        if kind < 0.15:
+            first_name = 'J'
+        elif kind < 0.3:
+            last_name = 'Smith2'
+        elif kind < 0.5:
+            email = f'student{i}@example'
+        rows.append((first_name, last_name, email))
+    return rows
+
+
+def bench_validation(size: int) -> Tuple[float, float]:
+    """Return the rows per second of the legacy validation and of validate_many on a mixed corpus."""
+    rows = mixed_credential_rows(size)
+    start = time.perf_counter()
+    legacy_results = [legacy_validate(*row) for row in rows]
+    legacy = size / (time.perf_counter() - start)
+    start = time.perf_counter()
+    results = validate_many(rows)
+    compiled = size / (time.perf_counter() - start)
+    assert results == legacy_results
+    return legacy, compiled
+
+
+def credential_lines(size: int) -> List[str]:
+    """Return `size` lines of valid student credentials."""
+    return [f'John Doe student{i}@example.com' for i in range(size)]
+
+
+def bench_import_students(size: int) -> float:
+    """Return the bulk import throughput for `size` students in rows per second."""
+    lines = credential_lines(size)
+    manager = StudentManager()
+    start = time.perf_counter()
+    manager.import_students(lines)
+    return size / (time.perf_counter() - start)
+
+
+def bench_interactive_students(size: int) -> float:
+    """Return the throughput of piping `size` students through main() in rows per second."""
+    stdin = io.StringIO('add students\n' + '\n'.join(credential_lines(size)) + '\nback\nexit\n')
+    original_stdin = sys.stdin
+    sys.stdin = stdin
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            learning_progress_tracker.main([])
+        return size / (time.perf_counter() - start)
+    finally:
+        sys.stdin = original_stdin
+
+
+def measure_memory(build: Callable[[], object]) -> int:
+    """Return the number of bytes still allocated by the object that `build` returns."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def bench_student_memory(size: int) -> Tuple[float, float]:
+    """Return the bytes per student of the legacy dict layout and of the columnar layout."""
+    emails = [f'student{i}@example.com' for i in range(size)]
+
+    def build_legacy() -> list:
+        return [LegacyStudent('John', 'Doe', email) for email in emails]
+
+    def build_columnar() -> tuple:
+        columns = CourseColumns()
+        return columns, [Student('John', 'Doe', email, columns) for email in emails]
+
+    return measure_memory(build_legacy) / size, measure_memory(build_columnar) / size
+
+
+def bench_sharded_points(size: int, workers: int, lines_per_student: int = 5) -> float:
+    """Return the points ingestion throughput in lines per second of a sharded manager with `workers` shards."""
+    allocator = KeyedHashIdAllocator()
+    ids = [allocator.allocate(f'student{i}@example.com') for i in range(size)]
+    rng = random.Random(0)
+    point_lines = [f'{rng.choice(ids)} {rng.randint(0, 50)} {rng.randint(0, 50)} 0 {rng.randint(0, 50)}'
+                   for _ in range(size * lines_per_student)]
+    with ShardedStudentManager(workers) as manager:
+        manager.import_students(credential_lines(size))
+        start = time.perf_counter()
+        manager.import_points(point_lines)
+        return len(point_lines) / (time.perf_counter() - start)
+
+
+def synthetic_roster(size: int, seed: int = 0) -> List[Tuple[str, str, str]]:
+    """Return `size` valid credential rows with unique emails, the same for the same seed."""
+    rng = random.Random(seed)
+    return [(rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), f'student{i}@example.com') for i in range(size)]
+
+
+def synthetic_point_stream(ids: List[int], size: int, seed: int = 0,
+                           weights: Tuple[float, ...] = COURSE_WEIGHTS) -> List[Tuple[int, Tuple[int, ...]]]:
+    """Return `size` (student id, points) submissions for random students.
+    Each submission scores in one course drawn from `weights`, so popularity and activity are skewed."""
+    rng = random.Random(seed)
+    stream = []
+    for _ in range(size):
+        points = [0] * len(COURSES)
+        points[rng.choices(range(len(COURSES)), weights)[0]] = rng.randint(1, 100)
+        stream.append((rng.choice(ids), tuple(points)))
+    return stream
+
+
+def timed(operation: Callable[[], object], operations: int) -> Dict[str, float]:
+    """Run `operation` once and return its wall time for `operations` units of work."""
+    start = time.perf_counter()
+    operation()
+    seconds = time.perf_counter() - start
+    return {'operations': operations, 'seconds': seconds,
+            'ops_per_second': operations / seconds if seconds else float('inf'),
+            'ns_per_op': seconds / operations * 1e9}
+
+
+def bench_operations(size: int, seed: int = 0, points_per_student: int = 10,
+                     lookups: int = 100_000, repeat: int = 100) -> Dict[str, Dict[str, float]]:
+    """Time the core tracker operations on a synthetic roster of `size` students.
+    Returns one timing per operation keyed by operation name."""
+    roster = synthetic_roster(size, seed)
+    manager = StudentManager()
+    results = {}
+    with open(os.devnull, 'w') as devnull:
+        manager.sink = TextSink(devnull)
+
+        def add_all() -> None:
+            for first_name, last_name, email in roster:
+                manager.add_student(first_name, last_name, email)
+
+        results['add_student'] = timed(add_all, size)
+        ids = [student.student_id for student in manager.students]
+        rng = random.Random(seed)
+        sample = [rng.choice(ids) for _ in range(lookups)]
+        find = manager.find_student_by_id
+
+        def find_all() -> None:
+            for student_id in sample:
+                find(student_id)
+
+        results['find_student_by_id'] = timed(find_all, lookups)
+        emails = [rng.choice(roster)[2] for _ in range(lookups)]
+
+        def find_all_emails() -> None:
+            for email in emails:
+                manager.find_student_by_email(email)
+
+        results['find_student_by_email'] = timed(find_all_emails, lookups)
+        prefixes = [rng.choice(FIRST_NAMES + LAST_NAMES)[:rng.randint(1, 3)] for _ in range(lookups // 10)]
+
+        def find_all_names() -> None:
+            for prefix in prefixes:
+                manager.find_students_by_name(prefix, limit=10)
+
+        results['find_students_by_name[limit=10]'] = timed(find_all_names, len(prefixes))
+        stream = synthetic_point_stream(ids, size * points_per_student, seed)
+
+        def update_all() -> None:
+            update = manager.update_points
+            for student_id, points in stream:
+                update(find(student_id), points)
+
+        results['update_points'] = timed(update_all, len(stream))
+        course_manager = CourseManager(manager)
+        for name in STATISTICS:
+            statistic = getattr(course_manager, name)
+
+            def compute() -> None:
+                for _ in range(repeat):
+                    # Statistics are memoized until the next write, so drop the cached results to time
+                    # the computation rather than a cache hit
+                    course_manager.statistics_cache.clear()
+                    statistic()
+
+            results[name] = timed(compute, repeat)
+        for course in COURSES:
+            results[f'display_course_details[{course}]'] = timed(
+                lambda: course_manager.display_course_details(course), manager.course_totals.enrolled[course] or 1)
+        for course in COURSES:
+            distribution = manager.course_distribution(course)
+
+            def percentiles() -> None:
+                for _ in range(repeat):
+                    for q in (0.5, 0.9, 0.99):
+                        distribution.sketch.quantile(q)
+
+            results[f'course_percentiles[{course}]'] = timed(percentiles, repeat)
+
+        def snapshots() -> None:
+            for _ in range(repeat):
+                manager.snapshot()
+
+        results['snapshot'] = timed(snapshots, repeat)
+        results['notify_students'] = timed(course_manager.notify_students,
+                                           len(manager.pending_notifications) or 1)
+    return results
+
+
+def compare_results(baseline: dict, current: dict) -> List[Tuple[str, str, float]]:
+    """Return (size, operation, speedup) for every core operation timed in both result files.
+    A speedup below 1 is a regression of the current results against the baseline."""
+    comparison = []
+    for size, operations in current.get('operations', {}).items():
+        for name, timing in operations.items():
+            reference = baseline.get('operations', {}).get(size, {}).get(name)
+            if reference is not None:
+                comparison.append((size, name, reference['seconds'] / timing['seconds']))
+    return comparison
+
+
+def import_time(module: str = 'learning_progress_tracker') -> float:
+    """Return the cumulative import time of `module` in milliseconds as reported by `python -X importtime`."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True)
+    for line in reversed(result.stderr.splitlines()):
+        _, cumulative, name = line.split('|')
+        if name.strip() == module:
+            return int(cumulative) / 1000
+    raise RuntimeError(f'{module} was not imported')
+
+
+def bench_startup(runs: int = 10) -> Dict[str, float]:
+    """Return the median import time of the tracker and the median wall time of a one-shot `find`
+    in milliseconds, each measured in fresh interpreters."""
+    imports = [import_time() for _ in range(runs)]
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'learning_progress_tracker.py')
+    with tempfile.TemporaryDirectory() as directory:
+        one_shot = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, script, 'find', '1', '--data-dir', directory],
+                           capture_output=True, check=True)
+            one_shot.append((time.perf_counter() - start) * 1000)
+    return {'import_ms': statistics.median(imports), 'one_shot_find_ms': statistics.median(one_shot)}
+
+
+def serve_roster(port: int, size: int) -> None:
+    """Serve a tracker preloaded with `size` students on localhost, used as the load-test target process."""
+    manager = StudentManager()
+    manager.import_students(credential_lines(size))
+    asyncio.run(TrackerService(manager, CourseManager(manager)).serve_forever('127.0.0.1', port))
+
+
+async def load_test_client(port: int, paths: List[Tuple[str, str, str]], latencies: List[float]) -> None:
+    """Send requests one after another over a keep-alive connection and record each latency."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for method, path, body in paths:
+        content = body.encode()
+        start = time.perf_counter()
+        writer.write(f'{method} {path} HTTP/1.1\r\nContent-Length: {len(content)}\r\n\r\n'.encode() + content)
+        await writer.drain()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b'\r\n':
+                break
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+def bench_service(size: int, clients: int, requests_per_client: int) -> Tuple[float, float, float]:
+    """Load test the HTTP service with concurrent clients mixing finds, statistics and points updates.
+    Return the p50 and p99 latency in milliseconds and the requests per second."""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    server = multiprocessing.Process(target=serve_roster, args=(port, size), daemon=True)
+    server.start()
+    try:
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port)).close()
+                break
+            except ConnectionRefusedError:
+                time.sleep(0.05)
+        allocator = KeyedHashIdAllocator()
+        rng = random.Random(0)
+        ids = [allocator.allocate(f'student{i}@example.com') for i in range(size)]
+        workloads = []
+        for _ in range(clients):
+            paths = []
+            for _ in range(requests_per_client):
+                kind = rng.random()
+                if kind < 0.6:
+                    paths.append(('GET', f'/students/{rng.choice(ids)}', ''))
+                elif kind < 0.8:
+                    paths.append(('GET', '/statistics', ''))
+                else:
+                    paths.append(('POST', '/points', f'{rng.choice(ids)} 10 0 5 0'))
+            workloads.append(paths)
+        latencies: List[float] = []
+
+        async def run() -> None:
+            await asyncio.gather(*(load_test_client(port, paths, latencies) for paths in workloads))
+
+        start = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.join()
+    latencies.sort()
+    return (latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000,
+            len(latencies) / elapsed)
+
+
+SUITES = ('startup', 'operations', 'service', 'sharding', 'validation', 'memory', 'lookup')
+
+
+def main(argv: List[str] = None) -> None:
+    """Run the selected benchmark suites, print a table per suite and optionally write the results as JSON."""
+    parser = argparse.ArgumentParser(description='Learning Progress Tracker benchmarks')
+    parser.add_argument('--suites', nargs='+', choices=SUITES, default=list(SUITES))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic rosters and point streams')
+    parser.add_argument('--memory-sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--validation-size', type=int, default=1_000_000)
+    parser.add_argument('--shard-size', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=200, help='requests per load-test client')
+    parser.add_argument('--startup-runs', type=int, default=10)
+    parser.add_argument('--max-import-ms', type=float,
+                        help='exit with an error when the median import time of the tracker exceeds this limit')
+    parser.add_argument('--min-import-speedup', type=float,
+                        help='exit with an error when bulk import is less than this many times faster than main()')
+    parser.add_argument('--json', metavar='FILE', help='write the results to FILE as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='compare the operation timings with an earlier JSON file')
+    args = parser.parse_args(argv)
+    results = {'python': platform.python_version(), 'platform': platform.platform(), 'seed': args.seed,
+               'created': time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+    if 'startup' in args.suites:
+        startup = results['startup'] = bench_startup(args.startup_runs)
+        print(f"startup: import {startup['import_ms']:.1f} ms, one-shot find {startup['one_shot_find_ms']:.1f} ms")
+    if 'operations' in args.suites:
+        results['operations'] = {}
+        print(f"{'students':<12} {'operation':<36} {'ops/s':>14} {'ns/op':>14}")
+        for size in args.sizes:
+            operations = results['operations'][str(size)] = bench_operations(size, args.seed)
+            for name, timing in operations.items():
+                print(f"{size:<12} {name:<36} {timing['ops_per_second']:>14.0f} {timing['ns_per_op']:>14.1f}")
+    if 'service' in args.suites:
+        p50, p99, throughput = bench_service(10_000, args.clients, args.requests)
+        results['service'] = {'p50_ms': p50, 'p99_ms': p99, 'requests_per_second': throughput}
+        print(f'service: p50 {p50:.2f} ms, p99 {p99:.2f} ms, {throughput:.0f} requests/s')
+    if 'sharding' in args.suites:
+        results['sharding'] = {}
+        print(f"{'workers':<12} {'points lines/s':<16}")
+        for workers in args.workers:
+            throughput = results['sharding'][str(workers)] = bench_sharded_points(args.shard_size, workers)
+            print(f'{workers:<12} {throughput:<16.0f}')
+    if 'validation' in args.suites:
+        legacy, compiled = bench_validation(args.validation_size)
+        results['validation'] = {'rows': args.validation_size, 'legacy_rows_per_second': legacy,
+                                 'validate_many_rows_per_second': compiled}
+        print(f'validation of {args.validation_size} mixed rows: legacy {legacy:.0f} rows/s, '
+              f'validate_many {compiled:.0f} rows/s')
+    if 'memory' in args.suites:
+        results['memory'] = {}
+        print(f"{'students':<12} {'legacy B/student':<18} {'columnar B/student':<18}")
+        for size in args.memory_sizes:
+            legacy, columnar = bench_student_memory(size)
+            results['memory'][str(size)] = {'legacy_bytes_per_student': legacy,
+                                            'columnar_bytes_per_student': columnar}
+            print(f'{size:<12} {legacy:<18.1f} {columnar:<18.1f}')
+    if 'lookup' in args.suites:
+        results['lookup'] = {}
+        print(f"{'students':<12} {'lookup ns':<12} {'import rows/s':<16} {'main() rows/s':<16} {'speedup':>8}")
+        for size in args.sizes:
+            lookup, imported, interactive = (bench_find_student_by_id(size), bench_import_students(size),
+                                             bench_interactive_students(size))
+            results['lookup'][str(size)] = {'lookup_ns': lookup, 'import_rows_per_second': imported,
+                                            'main_rows_per_second': interactive,
+                                            'import_speedup': imported / interactive}
+            print(f'{size:<12} {lookup:<12.1f} {imported:<16.0f} {interactive:<16.0f} {imported / interactive:>8.2f}')
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print(f"{'students':<12} {'operation':<36} {'speedup':>10}")
+        for size, name, speedup in compare_results(baseline, results):
+            print(f'{size:<12} {name:<36} {speedup:>10.2f}')
+    if args.max_import_ms is not None and 'startup' in results \
+            and results['startup']['import_ms'] > args.max_import_ms:
+        sys.exit(f"import time {results['startup']['import_ms']:.1f} ms exceeds {args.max_import_ms:.1f} ms")
+    if args.min_import_speedup is not None and 'lookup' in results:
+        slowest = min(results['lookup'].values(), key=lambda result: result['import_speedup'])
+        if slowest['import_speedup'] < args.min_import_speedup:
+            sys.exit(f"bulk import is only {slowest['import_speedup']:.2f}x faster than main(), "
+                     f"expected {args.min_import_speedup:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
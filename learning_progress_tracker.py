@@ -1,56 +1,973 @@
+import functools
+import gc
+import hashlib
+import heapq
+import json
+import math
+import os
 import re
-from typing import List, Tuple, Optional
+import sys
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import deque
+from collections.abc import MutableMapping
+from contextlib import ExitStack, contextmanager, nullcontext
+from itertools import count, islice
+from operator import itemgetter
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Tuple, Optional
+
+class CourseCatalog:
+    def __init__(self, courses: Iterable[Tuple[str, int]], aliases: Optional[Dict[str, str]] = None) -> None:
+        """Initialize a catalog from (course name, points needed to complete) pairs in display order.
+        Every course gets a dense index, and its name, its lower-cased name and any extra `aliases`
+        (alias -> course name) map to that index."""
+        courses = list(courses)
+        self.names: Tuple[str, ...] = tuple(name for name, _ in courses)
+        self.thresholds: Tuple[int, ...] = tuple(int(points) for _, points in courses)
+        self.index: Dict[str, int] = {name: index for index, name in enumerate(self.names)}
+        if len(self.index) != len(self.names):
+            raise ValueError('Course names must be unique')
+        self.aliases: Dict[str, int] = {name.lower(): index for index, name in enumerate(self.names)}
+        for alias, name in (aliases or {}).items():
+            self.aliases[alias.lower()] = self.index[name]
+
+    @classmethod
+    def from_config(cls, config) -> 'CourseCatalog':
+        """Build a catalog from a {name: points} mapping or a list of {"name", "points", "aliases"} objects"""
+        if isinstance(config, dict):
+            return cls(config.items())
+        aliases = {alias: course['name'] for course in config for alias in course.get('aliases', ())}
+        return cls(((course['name'], course['points']) for course in config), aliases)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'CourseCatalog':
+        """Load a catalog from a JSON configuration file"""
+        with open(path) as file:
+            return cls.from_config(json.load(file))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Return the index of a course by its name or case-insensitive alias, or None"""
+        index = self.index.get(name)
+        return index if index is not None else self.aliases.get(name.lower())
+
+    def find(self, name: str) -> Optional[str]:
+        """Return the name of a course by its name or case-insensitive alias, or None"""
+        index = self.lookup(name)
+        return self.names[index] if index is not None else None
+
+
+DEFAULT_CATALOG = CourseCatalog([('Python', 600), ('DSA', 400), ('Databases', 480), ('Flask', 550)])
+
+
+def use_catalog(catalog: CourseCatalog) -> None:
+    """Make `catalog` the course catalog of the tracker; call it before any manager is created"""
+    global CATALOG, COURSES, COURSE_INDEX, COURSE_THRESHOLDS, COURSE_POINTS_NEEDED
+    CATALOG = catalog
+    COURSES = catalog.names
+    COURSE_INDEX = catalog.index
+    COURSE_THRESHOLDS = catalog.thresholds
+    COURSE_POINTS_NEEDED = dict(zip(catalog.names, catalog.thresholds))
+
+
+use_catalog(DEFAULT_CATALOG)
+
+
+def completion_percentage(course: str, points: int) -> float:
+    """Calculate the percentage of completion for a course based on total points"""
+    return (points / COURSE_POINTS_NEEDED[course]) * 100
+
+
+# Stands in for the locks of a StudentManager that is not thread-safe
+NO_LOCK = nullcontext()
+
+
+class SequenceLock:
+    def __init__(self, lock=NO_LOCK) -> None:
+        """Initialize a sequence lock over data that is small enough to copy.
+        Writers are serialized by `lock` and keep the sequence odd while they change the data;
+        readers copy the data without locking and retry when a write started or finished meanwhile."""
+        self.lock = lock
+        self.sequence = 0
+
+    def __enter__(self) -> None:
+        """Start a write"""
+        self.lock.__enter__()
+        self.sequence += 1
+
+    def __exit__(self, *exc_info) -> None:
+        """Finish a write"""
+        self.sequence += 1
+        self.lock.__exit__(*exc_info)
+
+    def read(self, copy: Callable[[], object]) -> object:
+        """Return the result of `copy` called while no write was in progress"""
+        while True:
+            sequence = self.sequence
+            if not sequence & 1:
+                result = copy()
+                if self.sequence == sequence:
+                    return result
+            time.sleep(0)  # Let the writer finish
+
+
+class CourseTotals:
+    ENROLLED, SUBMISSIONS, POINTS = range(3)
+
+    def __init__(self) -> None:
+        """Initialize running per-course totals of enrolled students, submissions and points.
+        They are stored in one row per course index and exposed as course-keyed views."""
+        self.table: List[array] = [array('q', bytes(24)) for _ in COURSES]
+        self.enrolled = CourseView(self.table, self.ENROLLED)
+        self.submissions = CourseView(self.table, self.SUBMISSIONS)
+        self.points = CourseView(self.table, self.POINTS)
+
+    def record_submission(self, index: int, first_submission: bool, point: int) -> None:
+        """Account for a positive score submitted to the course with the given index"""
+        totals = self.table[index]
+        if first_submission:
+            totals[0] += 1
+        totals[1] += 1
+        totals[2] += point
+
+    def add(self, index: int, enrolled: int, submissions: int, points: int) -> None:
+        """Add changes of the enrolled count, submissions and points of one course"""
+        totals = self.table[index]
+        totals[0] += enrolled
+        totals[1] += submissions
+        totals[2] += points
+
+    def include_student(self, student: 'Student', sign: int = 1) -> None:
+        """Add the contribution of a student with existing course data to the totals"""
+        columns, row = student.columns, student.row
+        for index in range(len(COURSES)):
+            points = columns.progress[index][row]
+            self.add(index, sign * (points > 0), sign * columns.submissions[index][row], sign * points)
+
+    def discard_student(self, student: 'Student') -> None:
+        """Remove the contribution of a student from the totals"""
+        self.include_student(student, -1)
+
+    def copy(self) -> 'CourseTotals':
+        """Return an independent copy of the totals"""
+        totals = CourseTotals()
+        for row, source in zip(totals.table, self.table):
+            row[:] = source
+        return totals
+
+
+class PointsSketch:
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        """Initialize a DDSketch-style quantile sketch over positive integers.
+        Values are counted in logarithmic buckets, so a quantile is within `relative_accuracy` of the true value
+        and memory grows with the logarithm of the largest value rather than with the number of values.
+        Bucket counts can be decremented, so a value can be removed exactly when a student's points change."""
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.counts = array('q')
+        self.count = 0
+
+    def add(self, value: int, count: int = 1) -> None:
+        """Count a positive value `count` times"""
+        key = math.ceil(math.log(value) / self.log_gamma)
+        if key >= len(self.counts):
+            self.counts.frombytes(bytes(8 * (key + 1 - len(self.counts))))
+        self.counts[key] += count
+        self.count += count
+
+    def remove(self, value: int) -> None:
+        """Remove one occurrence of a previously added value"""
+        self.add(value, -1)
+
+    def merge(self, other: 'PointsSketch') -> None:
+        """Add the counts of a sketch with the same accuracy"""
+        if len(other.counts) > len(self.counts):
+            self.counts.frombytes(bytes(8 * (len(other.counts) - len(self.counts))))
+        for key, count in enumerate(other.counts):
+            self.counts[key] += count
+        self.count += other.count
+
+    def copy(self) -> 'PointsSketch':
+        """Return an independent copy of the sketch"""
+        sketch = PointsSketch(self.relative_accuracy)
+        sketch.counts = self.counts[:]
+        sketch.count = self.count
+        return sketch
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return an estimate of the lowest value whose rank reaches q * (count - 1), or None when the sketch is empty"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key, count in enumerate(self.counts):
+            seen += count
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return None
+
+
+class CourseDistribution:
+    BINS = 10
+
+    def __init__(self, threshold: int) -> None:
+        """Initialize the points distribution of the students enrolled in a course: a quantile sketch
+        and a histogram of completion percentages in BINS bins below 100% plus one for completed students"""
+        self.threshold = threshold
+        self.sketch = PointsSketch()
+        self.histogram = array('q', bytes(8 * (self.BINS + 1)))
+
+    def move(self, previous: int, points: int) -> None:
+        """Replace the points of one student, where 0 stands for not enrolled"""
+        if previous > 0:
+            self.sketch.remove(previous)
+            self.histogram[min(previous * self.BINS // self.threshold, self.BINS)] -= 1
+        if points > 0:
+            self.sketch.add(points)
+            self.histogram[min(points * self.BINS // self.threshold, self.BINS)] += 1
+
+    def merge(self, other: 'CourseDistribution') -> None:
+        """Add the students of another distribution of the same course"""
+        self.sketch.merge(other.sketch)
+        for index, count in enumerate(other.histogram):
+            self.histogram[index] += count
+
+    def copy(self) -> 'CourseDistribution':
+        """Return an independent copy of the distribution"""
+        distribution = CourseDistribution(self.threshold)
+        distribution.sketch = self.sketch.copy()
+        distribution.histogram = self.histogram[:]
+        return distribution
+
+    def records(self, course: str) -> Iterator[str]:
+        """Yield the text lines of the percentiles and the completion histogram"""
+        yield f'{course} distribution'
+        for label, q in (('Median', 0.5), ('P90', 0.9), ('P99', 0.99)):
+            value = self.sketch.quantile(q)
+            yield f"{label}: {'n/a' if value is None else round(value)}"
+        width = 100 // self.BINS
+        for index, count in enumerate(self.histogram):
+            label = '100%' if index == self.BINS else f'{index * width}-{(index + 1) * width - 1}%'
+            yield f'{label}: {count}'
+
+
+class SubmissionBucket:
+    __slots__ = ('index', 'submissions', 'points', 'students')
+
+    def __init__(self, index: int) -> None:
+        """Initialize the per-course pre-aggregates of one time bucket: submission counts, points and the
+        students whose latest submission to the course falls in the bucket, so each student is in one bucket"""
+        self.index = index
+        self.submissions = array('I', bytes(4 * len(COURSES)))
+        self.points = array('q', bytes(8 * len(COURSES)))
+        self.students: List[set] = [set() for _ in COURSES]
+
+
+class SubmissionHistory:
+    def __init__(self, retention: float = 30 * 86400, bucket_seconds: float = 3600,
+                 clock: Callable[[], float] = time.time) -> None:
+        """Initialize a bucketed time series of submissions that keeps `retention` seconds of history.
+        Buckets older than the retention are dropped as new ones are appended, so memory is bounded
+        by the number of buckets and the students active during the retention."""
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = max(1, math.ceil(retention / bucket_seconds))
+        self.clock = clock
+        self.buckets: Deque[SubmissionBucket] = deque()
+        # Per course, student id -> the bucket holding the student's latest submission
+        self.latest: List[Dict[int, SubmissionBucket]] = [{} for _ in COURSES]
+
+    def drop_oldest(self) -> None:
+        """Drop the oldest bucket and forget the students whose latest submission was in it"""
+        bucket = self.buckets.popleft()
+        for latest, students in zip(self.latest, bucket.students):
+            for student_id in students:
+                del latest[student_id]
+
+    def bucket(self, index: int) -> Optional[SubmissionBucket]:
+        """Return the bucket with the given index, creating it if needed,
+        or None when it is older than the retention"""
+        buckets = self.buckets
+        if not buckets or buckets[-1].index < index:
+            buckets.append(SubmissionBucket(index))
+            oldest = index - self.bucket_count + 1
+            while buckets[0].index < oldest:
+                self.drop_oldest()
+            return buckets[-1]
+        if index <= buckets[-1].index - self.bucket_count:
+            return None
+        # A late submission belongs to an earlier bucket
+        for position in range(len(buckets) - 1, -1, -1):
+            if buckets[position].index == index:
+                return buckets[position]
+            if buckets[position].index < index:
+                buckets.insert(position + 1, SubmissionBucket(index))
+                return buckets[position + 1]
+        buckets.appendleft(SubmissionBucket(index))
+        return buckets[0]
+
+    def record(self, student_id: int, points: Tuple[int, ...], timestamp: Optional[float] = None,
+               submissions: Optional[List[int]] = None) -> None:
+        """Add one submission to the bucket of its timestamp, the current time by default.
+        Summed points of several submissions can be recorded at once with their per-course `submissions`."""
+        bucket = self.bucket(int((self.clock() if timestamp is None else timestamp) // self.bucket_seconds))
+        if bucket is None:
+            return
+        for index, point in enumerate(points):
+            if point > 0:
+                bucket.submissions[index] += 1 if submissions is None else submissions[index]
+                bucket.points[index] += point
+                latest = self.latest[index]
+                previous = latest.get(student_id)
+                if previous is None or previous.index < bucket.index:
+                    # The student moves to the bucket of the newer submission
+                    if previous is not None:
+                        previous.students[index].discard(student_id)
+                    bucket.students[index].add(student_id)
+                    latest[student_id] = bucket
+
+    def window(self, seconds: float, now: Optional[float] = None) -> CourseTotals:
+        """Return the totals of the buckets overlapping the last `seconds`, with the number of
+        distinct students who submitted to each course in place of the enrolled count.
+        A student is counted in the bucket of their latest submission, so the distinct counts are summed in
+        O(buckets). They are exact for windows ending now; a window ending earlier misses the students who
+        submitted again after it."""
+        now = self.clock() if now is None else now
+        first = int((now - seconds) // self.bucket_seconds)
+        last = int(now // self.bucket_seconds)
+        totals = CourseTotals()
+        for bucket in reversed(self.buckets):
+            if bucket.index < first:
+                break
+            if bucket.index > last:
+                continue
+            for index, course in enumerate(COURSES):
+                totals.submissions[course] += bucket.submissions[index]
+                totals.points[course] += bucket.points[index]
+                totals.enrolled[course] += len(bucket.students[index])
+        return totals
+
+
+# Each space separated part of a name is at least two characters long, checked by the lookaheads
+FIRST_NAME_PATTERN = re.compile(r"(?=[^ ]{2})[A-Za-z]+(?:['-][A-Za-z]+)*")
+LAST_NAME_PATTERN = re.compile(r"(?=[^ ]{2})[A-Za-z]+(?:['-][A-Za-z]+)*(?: (?=[^ ]{2})[A-Za-z]+(?:['-][A-Za-z]+)*)*")
+EMAIL_PATTERN = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z0-9]{1,}")
+
+
+def validate_credentials(first_name: str, last_name: str, email: str) -> Optional[str]:
+    """Return the error message for the first invalid credential, or None if all are valid"""
+    if FIRST_NAME_PATTERN.fullmatch(first_name) is None:
+        return 'Incorrect first name.'
+    if LAST_NAME_PATTERN.fullmatch(last_name) is None:
+        return 'Incorrect last name.'
+    if EMAIL_PATTERN.fullmatch(email) is None:
+        return 'Incorrect email.'
+    return None
+
+
+def validate_many(rows: Iterable[Tuple[str, str, str]]) -> List[Optional[str]]:
+    """Validate many (first name, last name, email) rows and return one error message or None per row"""
+    first_name_match = FIRST_NAME_PATTERN.fullmatch
+    last_name_match = LAST_NAME_PATTERN.fullmatch
+    email_match = EMAIL_PATTERN.fullmatch
+    return [
+        'Incorrect first name.' if first_name_match(first_name) is None else
+        'Incorrect last name.' if last_name_match(last_name) is None else
+        'Incorrect email.' if email_match(email) is None else
+        None
+        for first_name, last_name, email in rows
+    ]
+
+
+@contextmanager
+def collector_paused() -> Iterator[None]:
+    """Pause the cyclic garbage collector while a bulk load allocates many objects that form no cycles"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class CommandProfiler:
+    def __init__(self, trace_allocations: bool = True, use_cprofile: bool = False) -> None:
+        """Initialize a profiler recording wall time, call counts and net allocations per command.
+        With `use_cprofile` a cProfile.Profile also records every function call for a pstats dump."""
+        self.trace_allocations = trace_allocations
+        self.records: Dict[str, dict] = {}
+        self.profile = None
+        if use_cprofile:
+            import cProfile
+            self.profile = cProfile.Profile()
+
+    def start(self) -> None:
+        """Start allocation tracing and the cProfile collector"""
+        import tracemalloc
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile is not None:
+            self.profile.enable()
+
+    def stop(self) -> None:
+        """Stop allocation tracing and the cProfile collector"""
+        import tracemalloc
+        if self.profile is not None:
+            self.profile.disable()
+        if self.trace_allocations and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """Record the wall time and net allocated bytes of one call of a command"""
+        import tracemalloc
+        allocated_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            record = self.records.setdefault(name, {'calls': 0, 'wall_time': 0.0, 'allocated_bytes': 0})
+            record['calls'] += 1
+            record['wall_time'] += elapsed
+            if tracemalloc.is_tracing():
+                record['allocated_bytes'] += tracemalloc.get_traced_memory()[0] - allocated_before
+
+    def dump_json(self, path: str) -> None:
+        """Write the per-command records as JSON"""
+        with open(path, 'w') as file:
+            json.dump(self.records, file, indent=2)
+
+    def dump_stats(self, path: str) -> None:
+        """Write the cProfile data in pstats format"""
+        self.profile.dump_stats(path)
+
+
+# The active profiler; None keeps the instrumentation down to one global lookup per command
+PROFILER: Optional[CommandProfiler] = None
+
+
+def profiled(name: str) -> Callable:
+    """Decorate a command so that its calls are recorded under `name` while profiling is enabled"""
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if PROFILER is None:
+                return function(*args, **kwargs)
+            with PROFILER.measure(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+TEXT_TEMPLATES = {
+    'message': '{text}',
+    'student_id': '{id}',
+    'course_header': '{course}\n' + f"{'id':<24} {'points':<12} {'completed':<12}",
+    'course_row': '{id:<24} {points:<12} {completed:.1f}%',
+    'notification': 'To: {email}\nRe: Your Learning Progress\n'
+                    'Hello, {name}! You have accomplished our {course} course!',
+}
+
+
+class OutputSink:
+    def __init__(self, stream=None, buffer_records: int = 4096) -> None:
+        """Initialize a buffered sink for output records.
+        Without a stream the sink writes to the sys.stdout in effect when it is flushed."""
+        self.stream = stream
+        self.buffer_records = buffer_records
+        self.buffer: List[str] = []
+
+    def render(self, record: dict) -> str:
+        """Return the text of a record without the trailing newline"""
+        raise NotImplementedError
+
+    def write(self, record: dict) -> None:
+        """Buffer a record and flush when the buffer is full"""
+        self.buffer.append(self.render(record))
+        if len(self.buffer) >= self.buffer_records:
+            self.flush()
+
+    def write_all(self, records: Iterable[dict]) -> None:
+        """Buffer every record of an iterable, typically a formatter generator"""
+        for record in records:
+            self.write(record)
+
+    def flush(self) -> None:
+        """Write the buffered records to the stream in one call"""
+        if self.buffer:
+            stream = self.stream if self.stream is not None else sys.stdout
+            stream.write('\n'.join(self.buffer) + '\n')
+            self.buffer.clear()
+        if self.stream is not None:
+            self.stream.flush()
+
+
+class TextSink(OutputSink):
+    def render(self, record: dict) -> str:
+        """Render a record with the same text the interactive commands print"""
+        return TEXT_TEMPLATES[record['type']].format(**record)
+
+
+class JsonlSink(OutputSink):
+    def render(self, record: dict) -> str:
+        """Render a record as one JSON object per line"""
+        return json.dumps(record)
+
+
+class SortedList:
+    BUCKET_SIZE = 512
+
+    def __init__(self) -> None:
+        """Initialize an empty sorted list stored as a list of bounded, individually sorted buckets.
+        Searches and positional lookups take O(log n), inserts and removals move at most one bucket of items."""
+        self.buckets: List[list] = []
+        self.maxes: list = []
+        self.size = 0
+        # Fenwick tree of the bucket lengths for positional lookups, built on first use and dropped
+        # whenever buckets are split, removed or rebuilt
+        self.positions: Optional[List[int]] = None
+        # Set once a snapshot shares the bucket lists: the bucket index is copied before the next change
+        # and a bucket is only changed in place when its id is in `owned`
+        self.shared = False
+        self.owned: Optional[set] = None
+
+    def snapshot(self) -> 'SortedList':
+        """Return a copy of the list in O(1). Both lists share the buckets and copy them before changing them."""
+        copy = SortedList.__new__(SortedList)
+        copy.buckets, copy.maxes, copy.size, copy.positions = self.buckets, self.maxes, self.size, self.positions
+        copy.shared = self.shared = True
+        copy.owned, self.owned = set(), set()
+        return copy
+
+    def writable_bucket(self, index: int) -> list:
+        """Return the bucket at `index` for a change, copying the bucket index and the bucket if they are shared"""
+        if self.shared:
+            self.buckets, self.maxes = list(self.buckets), list(self.maxes)
+            if self.positions is not None:
+                self.positions = list(self.positions)
+            self.shared = False
+        bucket = self.buckets[index]
+        if self.owned is not None and id(bucket) not in self.owned:
+            bucket = self.buckets[index] = bucket[:]
+            self.owned.add(id(bucket))
+        return bucket
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator:
+        for bucket in self.buckets:
+            yield from bucket
+
+    def add(self, key) -> None:
+        """Insert a key at its sorted position"""
+        self.size += 1
+        if not self.buckets:
+            self.buckets = [[key]]
+            self.maxes = [key]
+            self.positions = None
+            self.shared = False
+            return
+        index = bisect_left(self.maxes, key)
+        if index == len(self.buckets):
+            index -= 1
+            bucket = self.writable_bucket(index)
+            bucket.append(key)
+            self.maxes[index] = key
+        else:
+            bucket = self.writable_bucket(index)
+            insort(bucket, key)
+        if len(bucket) > 2 * self.BUCKET_SIZE:
+            # Split an oversized bucket in two halves
+            half = len(bucket) // 2
+            self.buckets[index:index + 1] = [bucket[:half], bucket[half:]]
+            self.maxes[index:index + 1] = [bucket[half - 1], bucket[-1]]
+            self.positions = None
+        else:
+            self.resize_bucket(index, 1)
+
+    def remove(self, key) -> None:
+        """Remove a key, raising ValueError when it is not present"""
+        index = bisect_left(self.maxes, key)
+        if index == len(self.buckets):
+            raise ValueError(f'{key!r} not in list')
+        bucket = self.buckets[index]
+        position = bisect_left(bucket, key)
+        if bucket[position] != key:
+            raise ValueError(f'{key!r} not in list')
+        bucket = self.writable_bucket(index)
+        del bucket[position]
+        self.size -= 1
+        if bucket:
+            self.maxes[index] = bucket[-1]
+            self.resize_bucket(index, -1)
+        else:
+            del self.buckets[index]
+            del self.maxes[index]
+            self.positions = None
+
+    def resize_bucket(self, index: int, delta: int) -> None:
+        """Record in the positional index that the bucket at `index` changed its length by `delta`"""
+        positions = self.positions
+        if positions is None:
+            return
+        node = index + 1
+        while node < len(positions):
+            positions[node] += delta
+            node += node & -node
+
+    def locate(self, position: int) -> Tuple[int, int]:
+        """Return the bucket index and the offset in that bucket of the key at `position` in O(log n).
+        The positional index is built in O(n / BUCKET_SIZE) after the buckets were split, removed or rebuilt."""
+        positions = self.positions
+        if positions is None:
+            # One-based Fenwick tree: node i holds the lengths of the buckets in (i - (i & -i), i]
+            positions = [0, *map(len, self.buckets)]
+            for node in range(1, len(positions)):
+                parent = node + (node & -node)
+                if parent < len(positions):
+                    positions[parent] += positions[node]
+            self.positions = positions
+        index = 0
+        step = 1 << (len(positions) - 1).bit_length()
+        while step:
+            node = index + step
+            if node < len(positions) and positions[node] <= position:
+                index = node
+                position -= positions[node]
+            step >>= 1
+        return index, position
+
+    def irange(self, minimum) -> Iterator:
+        """Yield the keys not less than `minimum` in sorted order, starting with a binary search"""
+        index = bisect_left(self.maxes, minimum)
+        if index == len(self.buckets):
+            return
+        bucket = self.buckets[index]
+        yield from islice(bucket, bisect_left(bucket, minimum), None)
+        for bucket in islice(self.buckets, index + 1, None):
+            yield from bucket
+
+    def update(self, keys: Iterable) -> None:
+        """Insert many keys. Large batches are merged with the existing keys and the buckets rebuilt at once."""
+        keys = list(keys)
+        if len(keys) * 16 < self.size:
+            for key in keys:
+                self.add(key)
+            return
+        # The existing keys form one sorted run, which the sort merges instead of re-sorting
+        items = list(self)
+        items.extend(keys)
+        items.sort()
+        size = self.BUCKET_SIZE
+        self.buckets = [items[start:start + size] for start in range(0, len(items), size)]
+        self.maxes = [bucket[-1] for bucket in self.buckets]
+        self.size = len(items)
+        self.positions = None
+        # The rebuilt buckets are not shared with any snapshot
+        self.shared = False
+        self.owned = None
+
+    def slice(self, offset: int = 0, limit: Optional[int] = None) -> list:
+        """Return up to `limit` keys starting at position `offset` in O(log n + limit)"""
+        if limit is None:
+            limit = self.size
+        offset = max(offset, 0)
+        if offset >= self.size or limit <= 0:
+            return []
+        index, offset = self.locate(offset)
+        result = self.buckets[index][offset:offset + limit]
+        for bucket in islice(self.buckets, index + 1, None):
+            if len(result) >= limit:
+                break
+            result.extend(bucket[:limit - len(result)])
+        return result
+
+
+class CourseColumns:
+    def __init__(self) -> None:
+        """Initialize empty array-backed per-course columns holding one row per student.
+        Points and submissions are stored as integer arrays, completion and notification flags as bytes."""
+        self.student_ids = array('Q')
+        self.progress: List[array] = [array('q') for _ in COURSES]
+        self.submissions: List[array] = [array('I') for _ in COURSES]
+        self.completed_courses: List[bytearray] = [bytearray() for _ in COURSES]
+        self.notifications_sent: List[bytearray] = [bytearray() for _ in COURSES]
+        self.free_rows: List[int] = []
+
+    def __len__(self) -> int:
+        """Return the number of allocated rows, including rows freed for reuse"""
+        return len(self.progress[0])
+
+    def allocate_row(self) -> int:
+        """Return a zeroed row, reusing a freed one when possible"""
+        if self.free_rows:
+            return self.free_rows.pop()
+        self.student_ids.append(0)
+        for column in self.progress:
+            column.append(0)
+        for column in self.submissions:
+            column.append(0)
+        for column in self.completed_courses:
+            column.append(0)
+        for column in self.notifications_sent:
+            column.append(0)
+        return len(self) - 1
+
+    def allocate_rows(self, count: int) -> List[int]:
+        """Return `count` zeroed rows, reusing freed ones first and growing the columns once for the rest"""
+        rows = [self.free_rows.pop() for _ in range(min(count, len(self.free_rows)))]
+        start = len(self)
+        grown = count - len(rows)
+        for column in (self.student_ids, *self.progress, *self.submissions):
+            column.frombytes(bytes(column.itemsize * grown))
+        for column in (*self.completed_courses, *self.notifications_sent):
+            column.extend(bytes(grown))
+        rows.extend(range(start, start + grown))
+        return rows
+
+    def free_row(self, row: int) -> None:
+        """Zero a row and keep it for the next allocation"""
+        self.student_ids[row] = 0
+        for columns in (self.progress, self.submissions, self.completed_courses, self.notifications_sent):
+            for column in columns:
+                column[row] = 0
+        self.free_rows.append(row)
+
+    def add_points(self, row: int, points: Tuple[int, ...]) -> None:
+        """Add the points of one submission to a row, leaving the totals to the caller"""
+        for index, point in enumerate(points):
+            if point > 0:
+                self.progress[index][row] += point
+                self.submissions[index][row] += 1
+
+    def set_progress(self, row: int, progress: List[int], submissions: List[int]) -> None:
+        """Store the new points of a row and add per-course submission counts, leaving the totals to the caller"""
+        for index, count in enumerate(submissions):
+            if count:
+                self.progress[index][row] = progress[index]
+                self.submissions[index][row] += count
+
+
+class CourseView(MutableMapping):
+    __slots__ = ('columns', 'row', 'value_type')
+
+    def __init__(self, columns: list, row: int, value_type: type = int) -> None:
+        """Initialize a course-keyed mapping over one row of per-course columns"""
+        self.columns = columns
+        self.row = row
+        self.value_type = value_type
+
+    def __getitem__(self, course: str):
+        return self.value_type(self.columns[COURSE_INDEX[course]][self.row])
+
+    def __setitem__(self, course: str, value) -> None:
+        self.columns[COURSE_INDEX[course]][self.row] = int(value)
+
+    def __delitem__(self, course: str) -> None:
+        raise TypeError('Courses cannot be removed from a student')
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(COURSES)
+
+    def __len__(self) -> int:
+        return len(COURSES)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class KeyedHashIdAllocator:
+    # The same email always gets the same first id, so shards can be chosen before a student is added
+    keyed_on_email = True
+
+    def __init__(self, key: bytes = b'learning-progress-tracker', bits: int = 63) -> None:
+        """Initialize an allocator deriving ids from a keyed BLAKE2b hash of the email.
+        Ids are the same in every process and fit in `bits` bits, so they can live in fixed-width integer arrays."""
+        self.key = key
+        self.mask = (1 << bits) - 1
+
+    def allocate(self, email: str, attempt: int = 0) -> int:
+        """Return the id of an email, or an alternative id for a later attempt after a collision"""
+        data = email.encode() if attempt == 0 else f'{attempt}:{email}'.encode()
+        digest = hashlib.blake2b(data, key=self.key, digest_size=8).digest()
+        # Zero marks free rows in the id column and is never handed out
+        return int.from_bytes(digest, 'big') & self.mask or 1
+
+    def allocate_many(self, emails: Iterable[str]) -> List[int]:
+        """Return the first-attempt ids of many emails"""
+        blake2b, key, mask, from_bytes = hashlib.blake2b, self.key, self.mask, int.from_bytes
+        return [from_bytes(blake2b(email.encode(), key=key, digest_size=8).digest(), 'big') & mask or 1
+                for email in emails]
+
+    def observe(self, student_id: int) -> None:
+        """Take note of an id restored from storage"""
+
+
+class CounterIdAllocator:
+    keyed_on_email = False
+
+    def __init__(self, start: int = 10000) -> None:
+        """Initialize an allocator handing out consecutive ids from `start`"""
+        self.next_id = start
+
+    def allocate(self, email: str, attempt: int = 0) -> int:
+        """Return the next unused id"""
+        student_id = self.next_id
+        self.next_id += 1
+        return student_id
+
+    def allocate_many(self, emails: Iterable[str]) -> List[int]:
+        """Return the next unused id for each of many emails"""
+        return [self.allocate(email) for email in emails]
+
+    def observe(self, student_id: int) -> None:
+        """Take note of an id restored from storage so that it is never handed out again"""
+        self.next_id = max(self.next_id, student_id + 1)
+
+
+DEFAULT_ID_ALLOCATOR = KeyedHashIdAllocator()
+
 
 class Student:
-    def __init__(self, first_name: str, last_name: str, email: str) -> None:
-        """Initialize the student with first name, last name, and email."""
+    __slots__ = ('first_name', 'last_name', 'email', 'columns', 'row', 'manager')
+
+    def __init__(self, first_name: str, last_name: str, email: str,
+                 columns: Optional[CourseColumns] = None, student_id: Optional[int] = None,
+                 row: Optional[int] = None) -> None:
+        """Initialize the student with first name, last name, and email.
+        Course data lives in a row of the given columns, or of private columns for a standalone student;
+        a row allocated in advance can be passed in. Without an explicit id the student gets the stable id
+        of the default allocator."""
         self.first_name = first_name
         self.last_name = last_name
         self.email = email
-        self.student_id = abs(hash(email))
-        self.progress = {'Python': 0, 'DSA': 0, 'Databases': 0, 'Flask': 0}
-        self.submissions = {'Python': 0, 'DSA': 0, 'Databases': 0, 'Flask': 0}
-        self.completed_courses = {'Python': False, 'DSA': False, 'Databases': False, 'Flask': False}
-        self.notifications_sent = {'Python': False, 'DSA': False, 'Databases': False, 'Flask': False}
+        self.columns = columns if columns is not None else CourseColumns()
+        self.row = row if row is not None else self.columns.allocate_row()
+        self.student_id = student_id if student_id is not None else DEFAULT_ID_ALLOCATOR.allocate(email)
+        self.manager: Optional['StudentManager'] = None
+
+    @property
+    def student_id(self) -> int:
+        """Unique id of the student, stored in the id column"""
+        return self.columns.student_ids[self.row]
+
+    @student_id.setter
+    def student_id(self, student_id: int) -> None:
+        self.columns.student_ids[self.row] = student_id
+
+    @property
+    def progress(self) -> CourseView:
+        """Points per course"""
+        return CourseView(self.columns.progress, self.row)
+
+    @property
+    def submissions(self) -> CourseView:
+        """Number of submissions per course"""
+        return CourseView(self.columns.submissions, self.row)
+
+    @property
+    def completed_courses(self) -> CourseView:
+        """Completion flag per course"""
+        return CourseView(self.columns.completed_courses, self.row, bool)
+
+    @property
+    def notifications_sent(self) -> CourseView:
+        """Notification flag per course"""
+        return CourseView(self.columns.notifications_sent, self.row, bool)
 
     @staticmethod
     def is_first_name_valid(first_name: str) -> bool:
         """Validate the student's first name using a regex pattern."""
-        if re.fullmatch(r"[A-Za-z]+(['-][A-Za-z]+)*", first_name) and len(first_name) > 1:
-            return all(len(part) > 1 for part in first_name.split(" "))
-        return False
+        return FIRST_NAME_PATTERN.fullmatch(first_name) is not None
 
     @staticmethod
     def is_last_name_valid(last_name: str) -> bool:
         """Validate the student's last name using a regex pattern."""
-        if re.fullmatch(r"[A-Za-z]+([' -][A-Za-z]+)*", last_name) and len(last_name) > 1:
-            return all(len(part) > 1 for part in last_name.split(" "))
-        return False
+        return LAST_NAME_PATTERN.fullmatch(last_name) is not None
 
     @staticmethod
     def is_email_valid(email: str) -> bool:
         """Validate the student's email using a regex pattern."""
-        return re.fullmatch(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z0-9]{1,}", email) is not None
+        return EMAIL_PATTERN.fullmatch(email) is not None
+
+    def move_to(self, columns: CourseColumns) -> None:
+        """Copy the course data of the student into a new row of other columns"""
+        row = columns.allocate_row()
+        columns.student_ids[row] = self.student_id
+        for name in ('progress', 'submissions', 'completed_courses', 'notifications_sent'):
+            source, target = getattr(self.columns, name), getattr(columns, name)
+            for index in range(len(COURSES)):
+                target[index][row] = source[index][self.row]
+        self.columns = columns
+        self.row = row
 
-    def update_points(self, points: Tuple[int, int, int, int]) -> None:
+    def update_points(self, points: Tuple[int, ...]) -> None:
         """Update the learning progress for the student"""
-        courses = ['Python', 'DSA', 'Databases', 'Flask']
-        for i, course in enumerate(courses):
-            if points[i] > 0:
-                self.progress[course] += points[i]
-                self.submissions[course] += 1
+        if self.manager is not None:
+            self.manager.update_points(self, points)
+        else:
+            self.columns.add_points(self.row, points)
         
     def is_enrolled_in_course(self, course: str) -> bool:
         """Check if the student is enrolled in a given course."""
-        return self.progress[course] > 0 
+        return self.columns.progress[COURSE_INDEX[course]][self.row] > 0
 
 
 class StudentManager:
-    def __init__(self) -> None:
-        """Initialize the student manager with an empty list of students and a set of emails."""
+    POINTS_BATCH = 10_000
+
+    def __init__(self, id_allocator=None, thread_safe: bool = False, lock_stripes: int = 64) -> None:
+        """Initialize the student manager with an empty list of students, a set of emails
+        and an index from student id to student.
+        Ids come from `id_allocator`, by default a keyed hash of the email.
+        With `thread_safe` the manager can be written and read from several threads:
+        students are added and removed under one registration lock, points are applied under
+        one of `lock_stripes` locks chosen by student id plus a lock per course for the leaderboard
+        and distribution, and the course totals are guarded by a sequence lock so that statistics
+        copy them without blocking writers."""
+        self.id_allocator = id_allocator if id_allocator is not None else DEFAULT_ID_ALLOCATOR
         self.students: List[Student] = []
-        self.emails: set = set()
-        self.student_ids: dict = {}
+        self.students_by_id: Dict[int, Student] = {}
+        self.students_by_email: Dict[str, Student] = {}
+        # (lower-cased first or last name, id) keys of every student for name prefix searches
+        self.name_index = SortedList()
+        self.course_totals = CourseTotals()
+        self.columns = CourseColumns()
+        self.leaderboards: Dict[str, SortedList] = {course: SortedList() for course in COURSES}
+        self.distributions: List[CourseDistribution] = [CourseDistribution(threshold)
+                                                        for threshold in COURSE_THRESHOLDS]
+        # Number of students who completed each course, counted as the completion flags are set
+        self.completions: List[int] = [0] * len(COURSES)
+        self.pending_notifications: Deque[Tuple[Student, str]] = deque()
+        self.sink: Optional[OutputSink] = None
+        self.store: Optional['TrackerStore'] = None
+        self.history: Optional[SubmissionHistory] = None
+        # Bumped by every write that can change the course statistics
+        self.version = 0
+        self.thread_safe = thread_safe
+        if thread_safe:
+            import threading
+            self.registration_lock = threading.Lock()
+            self.student_locks = [threading.Lock() for _ in range(lock_stripes)]
+            self.course_locks = [threading.Lock() for _ in COURSES]
+            self.history_lock = threading.Lock()
+            self.totals_lock = SequenceLock(threading.Lock())
+        else:
+            self.registration_lock = NO_LOCK
+            self.student_locks = [NO_LOCK]
+            self.course_locks = [NO_LOCK] * len(COURSES)
+            self.history_lock = NO_LOCK
+            # Statistics only read the totals under a sequence lock while other threads may write them
+            self.totals_lock = NO_LOCK
 
     @staticmethod
     def user_input_splitter(user_input: str) -> Optional[Tuple[str, str, str]]:
@@ -64,25 +981,292 @@ class StudentManager:
 
     def add_student(self, first_name: str, last_name: str, email: str) -> str:
         """Add a single student if the credentials are valid and return specific error messages."""
-        student = Student(first_name, last_name, email)
-        # Check if the first name is valid
-        if not Student.is_first_name_valid(first_name):
-            return 'Incorrect first name.'
-        # Check if the last name is valid
-        if not Student.is_last_name_valid(last_name):
-            return 'Incorrect last name.'
-        # Check if the email is valid
-        if not Student.is_email_valid(email):
-            return 'Incorrect email.'
-        # Check if the email is already in use
-        if email in self.emails:
-            return 'This email is already taken.'
-        # Add the student if all credentials are valid
-        self.students.append(student)
-        self.emails.add(email)
-        self.student_ids[email] = student.student_id
+        # Validate the credentials before anything is allocated for the student
+        error_message = validate_credentials(first_name, last_name, email)
+        if error_message is not None:
+            return error_message
+        with self.registration_lock:
+            # Check if the email is already in use
+            if email in self.students_by_email:
+                return 'This email is already taken.'
+            # Add the student if all credentials are valid
+            student = Student(first_name, last_name, email, self.columns, self.allocate_id(email))
+            self.register_student(student)
+            if self.store is not None:
+                self.store.log_student(student)
+        self.compact_store_if_due()
         return 'Success'
 
+    def register_student(self, student: Student) -> None:
+        """Index a student whose row already lives in the manager's columns"""
+        student.manager = self
+        with self.totals_lock:
+            self.version += 1
+        self.students.append(student)
+        self.students_by_id[student.student_id] = student
+        self.students_by_email[student.email] = student
+        for name in {student.first_name.lower(), student.last_name.lower()}:
+            self.name_index.add((name, student.student_id))
+
+    def register_students(self, credentials: List[Tuple[int, str, str, str]]) -> List[Tuple[int, str]]:
+        """Add a batch of validated (line number, first name, last name, email) rows.
+        Ids, rows and index entries are allocated for the whole batch at once, and the batch is journaled
+        with a single write. Return (line number, error message) pairs for the rejected emails."""
+        errors = []
+        with self.registration_lock:
+            accepted = []
+            emails = set()
+            for line_number, first_name, last_name, email in credentials:
+                if email in self.students_by_email or email in emails:
+                    errors.append((line_number, 'This email is already taken.'))
+                    continue
+                emails.add(email)
+                accepted.append((first_name, last_name, email))
+            if not accepted:
+                return errors
+            student_ids = self.id_allocator.allocate_many([email for _, _, email in accepted])
+            rows = self.columns.allocate_rows(len(accepted))
+            students = []
+            names = []
+            for (first_name, last_name, email), student_id, row in zip(accepted, student_ids, rows):
+                # Students of the batch are indexed as they are created, so the check also covers the batch
+                if student_id in self.students_by_id:
+                    student_id = self.allocate_id(email)
+                student = Student(first_name, last_name, email, self.columns, student_id, row)
+                student.manager = self
+                students.append(student)
+                self.students_by_id[student_id] = student
+                self.students_by_email[email] = student
+                first_name, last_name = first_name.lower(), last_name.lower()
+                names.append((first_name, student_id))
+                if last_name != first_name:
+                    names.append((last_name, student_id))
+            with self.totals_lock:
+                self.version += 1
+            self.students.extend(students)
+            # Sorting on each field with a key is much cheaper than comparing the tuples
+            names.sort(key=itemgetter(1))
+            names.sort(key=itemgetter(0))
+            self.name_index.update(names)
+            if self.store is not None:
+                self.store.log_students(students)
+        self.compact_store_if_due()
+        return errors
+
+    def allocate_id(self, email: str) -> int:
+        """Return a new student id, asking the allocator for another one while the id is taken"""
+        attempt = 0
+        student_id = self.id_allocator.allocate(email, attempt)
+        while student_id in self.students_by_id:
+            attempt += 1
+            student_id = self.id_allocator.allocate(email, attempt)
+        return student_id
+
+    def restore_student(self, student_id: int, first_name: str, last_name: str, email: str) -> Student:
+        """Add a previously validated student with a known id, as recorded by the persistent store"""
+        with self.registration_lock:
+            student = Student(first_name, last_name, email, self.columns, student_id)
+            self.id_allocator.observe(student_id)
+            self.register_student(student)
+        return student
+
+    def student_lock(self, student_id: int):
+        """Return the lock that guards the course data of a student"""
+        return self.student_locks[student_id % len(self.student_locks)]
+
+    def include_course_data(self, student: Student) -> None:
+        """Add the existing course data of a managed student to the totals, leaderboards and distributions
+        and queue its pending completion notifications"""
+        with self.totals_lock:
+            self.version += 1
+            self.course_totals.include_student(student)
+        for index, (course, points) in enumerate(student.progress.items()):
+            if points > 0:
+                with self.course_locks[index]:
+                    self.leaderboards[course].add((-points, student.student_id))
+                    self.distributions[index].move(0, points)
+            if student.completed_courses[course]:
+                with self.course_locks[index]:
+                    self.completions[index] += 1
+                if not student.notifications_sent[course]:
+                    self.pending_notifications.append((student, course))
+
+    def discard_course_data(self, student: Student) -> None:
+        """Remove the course data of a managed student from the totals, leaderboards and distributions"""
+        with self.totals_lock:
+            self.version += 1
+            self.course_totals.discard_student(student)
+        for index, (course, points) in enumerate(student.progress.items()):
+            if points > 0:
+                with self.course_locks[index]:
+                    self.leaderboards[course].remove((-points, student.student_id))
+                    self.distributions[index].move(points, 0)
+            if student.completed_courses[course]:
+                with self.course_locks[index]:
+                    self.completions[index] -= 1
+
+    def update_points(self, student: Student, points: Tuple[int, ...]) -> None:
+        """Apply the points of one submission to a managed student"""
+        with self.student_lock(student.student_id):
+            self.apply_points(student, points)
+        self.compact_store_if_due()
+
+    def apply_points(self, student: Student, points: Tuple[int, ...]) -> None:
+        """Apply the points of one submission to a managed student while holding the student's lock.
+        Only the courses whose points changed touch the totals, leaderboards and distributions."""
+        if student.manager is not self:
+            return  # Removed since it was looked up, so its row may already belong to another student
+        student_id, row = student.student_id, student.row
+        progress = self.columns.progress
+        changed = [(index, point, progress[index][row]) for index, point in enumerate(points) if point > 0]
+        self.columns.add_points(row, points)
+        with self.totals_lock:
+            self.version += 1
+            for index, point, previous_points in changed:
+                self.course_totals.record_submission(index, previous_points == 0, point)
+        for index, point, previous_points in changed:
+            course = COURSES[index]
+            current_points = previous_points + point
+            with self.course_locks[index]:
+                leaderboard = self.leaderboards[course]
+                if previous_points > 0:
+                    leaderboard.remove((-previous_points, student_id))
+                leaderboard.add((-current_points, student_id))
+                self.distributions[index].move(previous_points, current_points)
+            if current_points >= COURSE_THRESHOLDS[index] and not student.completed_courses[course]:
+                self.mark_completed(student, course)
+        if self.history is not None:
+            with self.history_lock:
+                self.history.record(student_id, points)
+        if self.store is not None:
+            self.store.log_points(student_id, points)
+
+    def set_completed(self, student: Student, course: str) -> None:
+        """Set the completion flag of a course, counting the student if the flag was not set yet"""
+        if student.completed_courses[course]:
+            return
+        student.completed_courses[course] = True
+        index = COURSE_INDEX[course]
+        with self.course_locks[index]:
+            self.completions[index] += 1
+        with self.totals_lock:
+            self.version += 1
+
+    def mark_completed(self, student: Student, course: str) -> None:
+        """Record that a student completed a course and queue the completion notification"""
+        self.set_completed(student, course)
+        if not student.notifications_sent[course]:
+            self.pending_notifications.append((student, course))
+
+    def mark_notified(self, student: Student, course: str) -> None:
+        """Record that the completion notification of a course was sent to a student"""
+        with self.student_lock(student.student_id):
+            if student.manager is not self:
+                return  # Removed since the completion was queued, so there is nothing to record
+            self.set_completed(student, course)
+            student.notifications_sent[course] = True
+            if self.store is not None:
+                self.store.log_notification(student.student_id, course)
+        self.compact_store_if_due()
+
+    def notification_records(self, mark_sent: bool = True) -> Iterator[dict]:
+        """Drain the queue of completions recorded since the last call and yield one notification
+        record per pending (student, course), marking each as sent unless `mark_sent` is False.
+        Completions queued by writers while the records are consumed are left for the next call."""
+        pending_notifications = self.pending_notifications
+        for _ in range(len(pending_notifications)):
+            try:
+                student, course = pending_notifications.popleft()
+            except IndexError:
+                break  # Drained by a concurrent notification run
+            # Skip students removed since the completion and notifications already sent
+            if student.manager is not self or student.notifications_sent[course]:
+                continue
+            yield {'type': 'notification', 'id': student.student_id, 'email': student.email,
+                   'name': f'{student.first_name} {student.last_name}', 'course': course}
+            if mark_sent:
+                self.mark_notified(student, course)
+
+    def confirm_notifications(self, sent: List[dict], failed: List[Tuple[dict, Optional[Exception]]]) -> None:
+        """Mark delivered notification records as sent and queue the undelivered ones again"""
+        for record in sent:
+            # Only confirmed deliveries are marked as sent
+            student = self.find_student_by_id(record['id'])
+            if student is not None:
+                self.mark_notified(student, record['course'])
+        for record, error in failed:
+            # Undelivered notifications are retried by the next notify command
+            student = self.find_student_by_id(record['id'])
+            if student is not None:
+                self.pending_notifications.append((student, record['course']))
+
+    def remove_student(self, student_id: int) -> bool:
+        """Remove a student by id and keep the email and id indexes consistent"""
+        with self.registration_lock:
+            student = self.students_by_id.get(student_id)
+            if student is None:
+                return False
+            with self.student_lock(student_id):
+                del self.students_by_id[student_id]
+                self.students.remove(student)
+                del self.students_by_email[student.email]
+                for name in {student.first_name.lower(), student.last_name.lower()}:
+                    self.name_index.remove((name, student_id))
+                self.discard_course_data(student)
+                # The removed student keeps its data in private columns so that the freed row can be reused
+                row = student.row
+                student.move_to(CourseColumns())
+                student.manager = None
+                self.columns.free_row(row)
+                if self.store is not None:
+                    self.store.log_removal(student_id)
+        self.compact_store_if_due()
+        return True
+
+    @contextmanager
+    def quiesced(self) -> Iterator[None]:
+        """Hold the registration lock and every student lock, so that no write is in progress in the block"""
+        with ExitStack() as stack:
+            stack.enter_context(self.registration_lock)
+            for lock in self.student_locks:
+                stack.enter_context(lock)
+            yield
+
+    def compact_store_if_due(self) -> None:
+        """Compact the store of a thread-safe manager once its snapshot interval is reached.
+        Writes are quiesced first, so the snapshot matches the journal written so far."""
+        store = self.store
+        if store is None or not store.defer_compaction or store.records_since_snapshot < store.snapshot_interval:
+            return
+        with self.quiesced():
+            if store.records_since_snapshot >= store.snapshot_interval:
+                store.compact()
+
+    def snapshot(self) -> 'ManagerSnapshot':
+        """Return a read-only view of the course totals, rankings and distributions as of now.
+        Leaderboards are shared copy-on-write, so the time taken does not depend on the number of students
+        and later writes proceed at full speed while a report reads the view."""
+        with self.quiesced():
+            return ManagerSnapshot(
+                self.version, self.course_totals.copy(),
+                {course: leaderboard.snapshot() for course, leaderboard in self.leaderboards.items()},
+                [distribution.copy() for distribution in self.distributions], self.completed_counts(), self.sink)
+
+    def completed_counts(self) -> Dict[str, int]:
+        """Return the number of students who completed each course"""
+        return dict(zip(COURSES, self.completions))
+
+    def add_student_from_input(self, user_input: str) -> str:
+        """Add a student from a line of credentials and return the resulting message."""
+        if user_input.count(' ') < 2:
+            return 'Incorrect credentials.'
+        split_data = self.user_input_splitter(user_input)
+        if not split_data:
+            return 'Incorrect credentials.'
+        first_name, last_name, email = split_data
+        return self.add_student(first_name, last_name, email)
+
+    @profiled('add students')
     def add_students(self) -> None:
         """Add students based on user input."""
         print("Enter student credentials or 'back' to return:")
@@ -91,15 +1275,7 @@ class StudentManager:
             user_input = input().strip()
             if user_input.lower() == 'back':
                 break
-            if not user_input or len(user_input.split(' ')) < 3:
-                print('Incorrect credentials.')
-                continue
-            split_data = self.user_input_splitter(user_input)
-            if not split_data:
-                print('Incorrect credentials.')
-                continue
-            first_name, last_name, email = split_data
-            result_message = self.add_student(first_name, last_name, email)
+            result_message = self.add_student_from_input(user_input)
             if result_message == 'Success':
                 student_count += 1
                 print('The student has been added.')
@@ -107,20 +1283,31 @@ class StudentManager:
                 print(result_message)
         print(f'Total {student_count} students were added')
 
-    def list_student_ids(self) -> None:
-        """List all student ids."""
+    def output_sink(self) -> OutputSink:
+        """Return the configured output sink or a text sink writing to stdout"""
+        return self.sink if self.sink is not None else TextSink()
+
+    def student_id_records(self) -> Iterator[dict]:
+        """Yield the output records of the student id listing"""
         if not self.students:
-            print('No students found.')
+            yield {'type': 'message', 'text': 'No students found.'}
         else:
-            print('Students:')
+            yield {'type': 'message', 'text': 'Students:'}
             for student in self.students:
-                print(student.student_id)
+                yield {'type': 'student_id', 'id': student.student_id}
+
+    @profiled('list')
+    def list_student_ids(self) -> None:
+        """List all student ids."""
+        sink = self.output_sink()
+        sink.write_all(self.student_id_records())
+        sink.flush()
 
-    def point_input_splitter(self, user_input: str) -> Optional[Tuple[str, int, int, int, int]]:
+    def point_input_splitter(self, user_input: str) -> Optional[Tuple]:
         """Split the user input into student_id and course points, but return student_id as string."""
         try:
             parts = user_input.split()
-            if len(parts) != 5 or not parts[0].isdigit():
+            if len(parts) != 1 + len(COURSES) or not parts[0].isdigit():
                 return None
             student_id = parts[0]
             points = tuple(map(int, parts[1:]))
@@ -133,11 +1320,156 @@ class StudentManager:
 
     def find_student_by_id(self, student_id: int) -> Optional[Student]:
         """Find a student by their unique ID"""
-        for student in self.students:
-            if student.student_id == student_id:
-                return student
-        return None
+        return self.students_by_id.get(student_id)
+
+    def course_distribution(self, course: str) -> CourseDistribution:
+        """Return a copy of the points distribution of a course"""
+        index = COURSE_INDEX[course]
+        with self.course_locks[index]:
+            return self.distributions[index].copy()
+
+    def course_ranking(self, course: str, offset: int = 0, limit: Optional[int] = None) -> list:
+        """Return a page of the (-points, id) leaderboard entries of a course"""
+        with self.course_locks[COURSE_INDEX[course]]:
+            return self.leaderboards[course].slice(offset, limit)
+
+    def statistics_snapshot(self) -> Tuple[int, CourseTotals]:
+        """Return the version and the course totals as of one point in time, without blocking writers"""
+        if not self.thread_safe:
+            return self.version, self.course_totals
+        return self.totals_lock.read(lambda: (self.version, self.course_totals.copy()))
+
+    def find_student_by_email(self, email: str) -> Optional[Student]:
+        """Find a student by their email"""
+        return self.students_by_email.get(email)
+
+    def find_students_by_name(self, prefix: str, limit: Optional[int] = None) -> List[Student]:
+        """Find the students whose first or last name starts with `prefix`, ignoring case,
+        ordered by the matching name and then by id"""
+        prefix = prefix.lower()
+        students = []
+        seen = set()
+        with self.registration_lock:
+            for name, student_id in self.name_index.irange((prefix,)):
+                if not name.startswith(prefix) or len(students) == limit:
+                    break
+                if student_id not in seen:
+                    seen.add(student_id)
+                    students.append(self.students_by_id[student_id])
+        return students
 
+    def parse_points_input(self, user_command: str) -> Tuple[Optional[Student], Optional[Tuple[int, ...]], str]:
+        """Parse a line holding an id and one score per course.
+        Return the student, the points and 'Points updated.', or None, None and the error message."""
+        user_input = user_command.split()
+        if len(user_input) < 1 + len(COURSES):
+            return None, None, 'Incorrect points format'
+        student_id = user_input[0]
+        try:
+            student_id_int = int(student_id)
+            student = self.find_student_by_id(student_id_int)
+        except ValueError:
+            student = None
+        if student is None:
+            return None, None, f'No student is found for id={student_id}.'
+        try:
+            points = tuple(map(int, user_input[1:]))
+            if len(points) != len(COURSES) or any(point < 0 for point in points):
+                return None, None, 'Incorrect points format'
+        except ValueError:
+            return None, None, 'Incorrect points format'
+        return student, points, 'Points updated.'
+
+    def add_points_from_input(self, user_command: str) -> str:
+        """Add points from a line holding an id and one score per course and return the resulting message."""
+        student, points, message = self.parse_points_input(user_command)
+        if student is not None:
+            student.update_points(points)
+        return message
+
+    def apply_points_batch(self, rows: Iterable[str]) -> List[str]:
+        """Add points from a block of id and score lines and return the message of every line.
+        Valid lines are grouped by student and the summed points of each student are applied once,
+        with the course totals updated once per batch. The resulting state, completion notifications
+        and journal are the same as when the lines are applied one by one."""
+        messages = []
+        applied: List[Tuple[int, Tuple[int, ...]]] = []
+        # Student -> (line position, points) of each of its valid lines
+        groups: Dict[Student, List[Tuple[int, Tuple[int, ...]]]] = {}
+        for row in rows:
+            student, points, message = self.parse_points_input(row)
+            if student is not None:
+                groups.setdefault(student, []).append((len(messages), points))
+                applied.append((student.student_id, points))
+            messages.append(message)
+        if not applied:
+            return messages
+        enrolled = [0] * len(COURSES)
+        submitted = [0] * len(COURSES)
+        scored = [0] * len(COURSES)
+        completions: List[Tuple[int, Student, str]] = []
+        for student, lines in groups.items():
+            student_id = student.student_id
+            with self.student_lock(student_id):
+                if student.manager is not self:
+                    continue  # Removed by another thread since it was looked up
+                row = student.row
+                previous = [column[row] for column in self.columns.progress]
+                running = list(previous)
+                submissions = [0] * len(COURSES)
+                completed = [bool(column[row]) for column in self.columns.completed_courses]
+                for position, points in lines:
+                    for index, point in enumerate(points):
+                        if point > 0:
+                            running[index] += point
+                            submissions[index] += 1
+                            # Completions are collected in line order, as the line by line updates would queue them
+                            if not completed[index] and running[index] >= COURSE_THRESHOLDS[index]:
+                                completed[index] = True
+                                completions.append((position, student, COURSES[index]))
+                                self.set_completed(student, COURSES[index])
+                self.columns.set_progress(row, running, submissions)
+                for index, course in enumerate(COURSES):
+                    if submissions[index]:
+                        if previous[index] == 0:
+                            enrolled[index] += 1
+                        submitted[index] += submissions[index]
+                        scored[index] += running[index] - previous[index]
+                        with self.course_locks[index]:
+                            leaderboard = self.leaderboards[course]
+                            if previous[index] > 0:
+                                leaderboard.remove((-previous[index], student_id))
+                            leaderboard.add((-running[index], student_id))
+                            self.distributions[index].move(previous[index], running[index])
+                if self.history is not None:
+                    with self.history_lock:
+                        self.history.record(student_id, [after - before for after, before in zip(running, previous)],
+                                            submissions=submissions)
+                if self.thread_safe:
+                    # Counted and journaled while the student is locked, so that neither a snapshot nor
+                    # the removal of the student can fall between its new points and their totals and records
+                    self.add_course_totals(enrolled, submitted, scored)
+                    enrolled, submitted, scored = [0] * len(COURSES), [0] * len(COURSES), [0] * len(COURSES)
+                    if self.store is not None:
+                        self.store.log_points_batch([(student_id, points) for _, points in lines])
+        self.add_course_totals(enrolled, submitted, scored)
+        completions.sort(key=lambda completion: completion[0])
+        for _, student, course in completions:
+            if not student.notifications_sent[course]:
+                self.pending_notifications.append((student, course))
+        if not self.thread_safe and self.store is not None:
+            self.store.log_points_batch(applied)
+        self.compact_store_if_due()
+        return messages
+
+    def add_course_totals(self, enrolled: List[int], submissions: List[int], points: List[int]) -> None:
+        """Add per-course changes of the enrolled count, submissions and points to the totals as one write"""
+        with self.totals_lock:
+            self.version += 1
+            for index in range(len(COURSES)):
+                self.course_totals.add(index, enrolled[index], submissions[index], points[index])
+
+    @profiled('add points')
     def add_points(self) -> None:
         """Add points to a specific student id"""
         print("Enter an id and points or 'back' to return")
@@ -145,30 +1477,62 @@ class StudentManager:
             user_command = input().strip()
             if user_command.lower() == 'back':
                 break
-            user_input = user_command.split()
-            if len(user_input) < 5:
-                print('Incorrect points format')
-                continue
-            student_id = user_input[0]
-            try:
-                student_id_int = int(student_id)
-                student = self.find_student_by_id(student_id_int)
-            except ValueError:
-                student = None
-            if student is None:
-                print(f'No student is found for id={student_id}.')
+            print(self.add_points_from_input(user_command))
+
+    @profiled('import students')
+    def import_students(self, lines: Iterable[str]) -> Tuple[int, List[Tuple[int, str]]]:
+        """Add students from lines of credentials without interaction.
+        Return the number of added students and a list of (line number, error message) pairs.
+        The lines are validated and registered as one batch, with the same messages as adding them one by one."""
+        with collector_paused():
+            return self.import_student_batch(lines)
+
+    def import_student_batch(self, lines: Iterable[str]) -> Tuple[int, List[Tuple[int, str]]]:
+        """Validate and register lines of credentials as one batch"""
+        errors = []
+        credentials = []
+        for line_number, line in enumerate(lines, 1):
+            user_input = line.strip()
+            if not user_input:
                 continue
-            try:
-                points = tuple(map(int, user_input[1:]))
-                if len(points) != 4 or any(point < 0 for point in points):
-                    print('Incorrect points format')
-                    continue
-            except ValueError:
-                print('Incorrect points format')
+            split_data = self.user_input_splitter(user_input) if user_input.count(' ') >= 2 else None
+            if not split_data:
+                errors.append((line_number, 'Incorrect credentials.'))
                 continue
-            student.update_points(points)
-            print('Points updated.')
+            credentials.append((line_number, *split_data))
+        valid = []
+        for row, error_message in zip(credentials, validate_many([row[1:] for row in credentials])):
+            if error_message is None:
+                valid.append(row)
+            else:
+                errors.append((row[0], error_message))
+        taken = self.register_students(valid)
+        errors.extend(taken)
+        errors.sort()
+        return len(valid) - len(taken), errors
+
+    @profiled('import points')
+    def import_points(self, lines: Iterable[str]) -> Tuple[int, List[Tuple[int, str]]]:
+        """Add points from lines of ids and scores without interaction.
+        Return the number of applied lines and a list of (line number, error message) pairs."""
+        updated = 0
+        errors = []
+        numbered = ((line_number, line.strip()) for line_number, line in enumerate(lines, 1))
+        numbered = ((line_number, user_command) for line_number, user_command in numbered if user_command)
+        while True:
+            # Lines are applied in batches to amortize the aggregate updates
+            batch = list(islice(numbered, self.POINTS_BATCH))
+            if not batch:
+                break
+            messages = self.apply_points_batch([user_command for _, user_command in batch])
+            for (line_number, _), result_message in zip(batch, messages):
+                if result_message == 'Points updated.':
+                    updated += 1
+                else:
+                    errors.append((line_number, result_message))
+        return updated, errors
 
+    @profiled('find')
     def find_student(self) -> None:
         """Output student information to the console based on the student id"""
         print("Enter an id or 'back' to return")
@@ -176,240 +1540,1344 @@ class StudentManager:
             user_command = input().strip()
             if user_command.lower() == 'back':
                 break
-            original_id = user_command
-            try:
-                student_id = int(user_command)
-            except ValueError:
-                student_id = None
-            student = self.find_student_by_id(student_id) if isinstance(student_id, int) else None
+            for line in self.student_query(user_command):
+                print(line)
+
+    def student_query(self, user_command: str) -> List[str]:
+        """Return the output lines of a find query: an id, `email <address>` or `name <prefix>`"""
+        mode, _, value = user_command.partition(' ')
+        value = value.strip()
+        if mode == 'email' and value:
+            student = self.find_student_by_email(value)
             if student is None:
-                print(f'No student is found for id={original_id}.')
-            else:
-                course_points = student.progress
-                print(f"{student_id} points: Python={course_points['Python']}; DSA={course_points['DSA']}; "
-                      f"Databases={course_points['Databases']}; Flask={course_points['Flask']}")
+                return [f'No student is found for email={value}.']
+            return [self.student_summary(str(student.student_id))]
+        if mode == 'name' and value:
+            students = self.find_students_by_name(value)
+            if not students:
+                return [f'No student is found for name={value}.']
+            return [self.student_summary(str(student.student_id)) for student in students]
+        return [self.student_summary(user_command)]
+
+    def student_summary(self, user_command: str) -> str:
+        """Return the points line of the student with the given id, or the not found message"""
+        try:
+            student_id = int(user_command)
+        except ValueError:
+            student_id = None
+        student = self.find_student_by_id(student_id) if isinstance(student_id, int) else None
+        if student is None:
+            return f'No student is found for id={user_command}.'
+        with self.student_lock(student_id):
+            progress = student.progress.items()
+            return f'{student_id} points: ' + '; '.join(f'{course}={points}' for course, points in progress)
     
 
+class ManagerSnapshot:
+    thread_safe = False
+    history = None
+
+    def __init__(self, version: int, course_totals: CourseTotals, leaderboards: Dict[str, SortedList],
+                 distributions: List[CourseDistribution], completed: Dict[str, int],
+                 sink: Optional[OutputSink] = None) -> None:
+        """Initialize a point-in-time view of a student manager, as returned by StudentManager.snapshot.
+        It answers the reads of a CourseManager report and must not be modified."""
+        self.version = version
+        self.course_totals = course_totals
+        self.leaderboards = leaderboards
+        self.distributions = distributions
+        self.completed = completed
+        self.sink = sink
+
+    def statistics_snapshot(self) -> Tuple[int, CourseTotals]:
+        """Return the version and the course totals of the view"""
+        return self.version, self.course_totals
+
+    def course_ranking(self, course: str, offset: int = 0, limit: Optional[int] = None) -> list:
+        """Return a page of the (-points, id) leaderboard entries of a course"""
+        return self.leaderboards[course].slice(offset, limit)
+
+    def course_distribution(self, course: str) -> CourseDistribution:
+        """Return the points distribution of a course"""
+        return self.distributions[COURSE_INDEX[course]]
+
+    def completed_counts(self) -> Dict[str, int]:
+        """Return the number of students who had completed each course"""
+        return self.completed
+
+    def output_sink(self) -> OutputSink:
+        """Return the output sink of the manager or a text sink writing to stdout"""
+        return self.sink if self.sink is not None else TextSink()
+
+
+class TrackerStore:
+    SNAPSHOT_FILE = 'snapshot.json'
+    JOURNAL_FILE = 'journal.log'
+
+    def __init__(self, directory: str, snapshot_interval: int = 100_000, fsync: bool = False) -> None:
+        """Initialize a persistent store that keeps a snapshot and an append-only journal in a directory.
+        The journal is compacted into a new snapshot every `snapshot_interval` records."""
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.fsync = fsync
+        self.sequence = 0
+        self.records_since_snapshot = 0
+        self.manager: Optional[StudentManager] = None
+        self.journal = None
+        # A thread-safe manager serializes the appends and compacts while no write is in progress
+        self.lock = NO_LOCK
+        self.defer_compaction = False
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def snapshot_path(self) -> str:
+        """Path of the snapshot file"""
+        return os.path.join(self.directory, self.SNAPSHOT_FILE)
+
+    @property
+    def journal_path(self) -> str:
+        """Path of the journal file"""
+        return os.path.join(self.directory, self.JOURNAL_FILE)
+
+    def load(self, manager: StudentManager) -> None:
+        """Restore the snapshot and the journal tail into an empty manager and start journaling its changes"""
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path) as file:
+                snapshot = json.load(file)
+            if snapshot.get('courses', list(DEFAULT_CATALOG.names)) != list(COURSES):
+                raise ValueError(f"The snapshot was written for the courses {', '.join(snapshot['courses'])}")
+            self.sequence = snapshot['sequence']
+            for student_id, first_name, last_name, email, progress, submissions, completed, notified \
+                    in snapshot['students']:
+                student = manager.restore_student(student_id, first_name, last_name, email)
+                for index, course in enumerate(COURSES):
+                    student.progress[course] = progress[index]
+                    student.submissions[course] = submissions[index]
+                    student.completed_courses[course] = completed[index]
+                    student.notifications_sent[course] = notified[index]
+                manager.include_course_data(student)
+        if os.path.exists(self.journal_path):
+            valid_length = 0
+            with open(self.journal_path, 'rb') as file:
+                for line in file:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError('Unterminated journal record')
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # A torn final record from an interrupted write
+                    valid_length += len(line)
+                    # Records already contained in the snapshot are skipped
+                    if record[0] > self.sequence:
+                        self.replay(manager, record)
+                        self.sequence = record[0]
+                        self.records_since_snapshot += 1
+            # Drop the torn record so that new records start on a clean line
+            os.truncate(self.journal_path, valid_length)
+        self.manager = manager
+        self.journal = open(self.journal_path, 'a')
+        if manager.thread_safe:
+            import threading
+            self.lock = threading.Lock()
+            self.defer_compaction = True
+        manager.store = self
+
+    @staticmethod
+    def replay(manager: StudentManager, record: list) -> None:
+        """Apply one journal record to the manager"""
+        operation = record[1]
+        if operation == 'add':
+            manager.restore_student(*record[2:])
+            return
+        if operation == 'remove':
+            manager.remove_student(record[2])
+            return
+        student = manager.find_student_by_id(record[2])
+        if student is None:
+            return  # Journals written before removed students were skipped can name them
+        if operation == 'points':
+            student.update_points(tuple(record[3:]))
+        elif operation == 'notify':
+            manager.mark_notified(student, record[3])
+
+    def log(self, *record) -> None:
+        """Append a record to the journal and compact once the snapshot interval is reached"""
+        self.log_many([record])
+
+    def log_many(self, records: List[tuple]) -> None:
+        """Append several records to the journal with a single write"""
+        with self.lock:
+            lines = []
+            for record in records:
+                self.sequence += 1
+                lines.append(json.dumps([self.sequence, *record]) + '\n')
+            self.journal.write(''.join(lines))
+            self.journal.flush()
+            if self.fsync:
+                os.fsync(self.journal.fileno())
+            self.records_since_snapshot += len(lines)
+        if self.records_since_snapshot >= self.snapshot_interval and not self.defer_compaction:
+            self.compact()
+
+    def log_student(self, student: Student) -> None:
+        """Record a newly added student"""
+        self.log('add', student.student_id, student.first_name, student.last_name, student.email)
+
+    def log_students(self, students: List[Student]) -> None:
+        """Record several newly added students with a single write"""
+        self.log_many([('add', student.student_id, student.first_name, student.last_name, student.email)
+                       for student in students])
+
+    def log_points(self, student_id: int, points: Tuple[int, ...]) -> None:
+        """Record the points of one submission"""
+        self.log('points', student_id, *points)
+
+    def log_points_batch(self, rows: List[Tuple[int, Tuple[int, ...]]]) -> None:
+        """Record the points of several submissions, one journal record per submission"""
+        self.log_many([('points', student_id, *points) for student_id, points in rows])
+
+    def log_notification(self, student_id: int, course: str) -> None:
+        """Record a sent completion notification"""
+        self.log('notify', student_id, course)
+
+    def log_removal(self, student_id: int) -> None:
+        """Record the removal of a student"""
+        self.log('remove', student_id)
+
+    def compact(self) -> None:
+        """Write a snapshot of the manager and truncate the journal"""
+        students = [
+            [student.student_id, student.first_name, student.last_name, student.email,
+             list(student.progress.values()), list(student.submissions.values()),
+             [int(flag) for flag in student.completed_courses.values()],
+             [int(flag) for flag in student.notifications_sent.values()]]
+            for student in self.manager.students
+        ]
+        temporary_path = self.snapshot_path + '.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump({'sequence': self.sequence, 'courses': list(COURSES), 'students': students}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.snapshot_path)
+        # A crash before the truncation is harmless: replay skips records up to the snapshot sequence
+        self.journal.close()
+        self.journal = open(self.journal_path, 'w')
+        self.records_since_snapshot = 0
+
+    def close(self) -> None:
+        """Flush and close the journal"""
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        if self.manager is not None:
+            self.manager.store = None
+
+
+class ShardIdAllocator:
+    def __init__(self, allocator, shard_index: int, shard_count: int) -> None:
+        """Initialize an allocator that only hands out ids owned by one shard (id % shard_count == shard_index)"""
+        self.allocator = allocator
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+
+    def allocate(self, email: str, attempt: int = 0) -> int:
+        """Return the `attempt`-th candidate id of the wrapped allocator that belongs to this shard"""
+        candidates = (self.allocator.allocate(email, raw_attempt) for raw_attempt in count())
+        owned = (student_id for student_id in candidates if student_id % self.shard_count == self.shard_index)
+        return next(islice(owned, attempt, None))
+
+    def allocate_many(self, emails: Iterable[str]) -> List[int]:
+        """Return the first candidate id owned by this shard for each of many emails"""
+        return [self.allocate(email) for email in emails]
+
+    def observe(self, student_id: int) -> None:
+        """Take note of an id restored from storage"""
+        self.allocator.observe(student_id)
+
+
+class ShardWorker:
+    def __init__(self, shard_index: int, shard_count: int, id_allocator) -> None:
+        """Initialize the StudentManager owning one shard of the students"""
+        self.manager = StudentManager(ShardIdAllocator(id_allocator, shard_index, shard_count))
+
+    def add_students(self, lines: List[str]) -> List[str]:
+        """Add students from credential lines as one batch and return one message per line"""
+        messages = ['Success'] * len(lines)
+        for line_number, error_message in self.manager.import_students(lines)[1]:
+            messages[line_number - 1] = error_message
+        return messages
+
+    def add_points(self, lines: List[str]) -> List[str]:
+        """Add points from id and score lines and return one message per line"""
+        return self.manager.apply_points_batch(lines)
+
+    def course_totals(self) -> Tuple[dict, dict, dict]:
+        """Return the partial enrolled, submission and point totals of the shard"""
+        totals = self.manager.course_totals
+        return dict(totals.enrolled), dict(totals.submissions), dict(totals.points)
+
+    def distribution(self, course: str) -> CourseDistribution:
+        """Return the points distribution of a course over the students of the shard"""
+        return self.manager.course_distribution(course)
+
+    def completed_counts(self) -> dict:
+        """Return the number of students of the shard who completed each course"""
+        return self.manager.completed_counts()
+
+    def leaderboard(self, course: str, stop: int) -> list:
+        """Return the first `stop` (-points, id) keys of the shard's ranking of a course"""
+        return self.manager.leaderboards[course].slice(0, stop)
+
+    def find(self, student_id: int) -> Optional[dict]:
+        """Return the points of a student of the shard"""
+        student = self.manager.find_student_by_id(student_id)
+        return dict(student.progress) if student is not None else None
+
+    def student_ids(self) -> List[int]:
+        """Return the ids of the students of the shard"""
+        return [student.student_id for student in self.manager.students]
+
+    def notification_records(self, mark_sent: bool = True) -> List[dict]:
+        """Drain the pending notifications of the shard, marking them as sent unless `mark_sent` is False"""
+        return list(self.manager.notification_records(mark_sent))
+
+    def confirm_notifications(self, sent: List[dict], failed: List[dict]) -> None:
+        """Mark delivered records of the shard as sent and queue the undelivered ones again"""
+        self.manager.confirm_notifications(sent, [(record, None) for record in failed])
+
+
+def run_shard_worker(connection, shard_index: int, shard_count: int, id_allocator,
+                     catalog: CourseCatalog = DEFAULT_CATALOG) -> None:
+    """Serve (method name, arguments) requests for one shard until the connection sends None"""
+    use_catalog(catalog)
+    worker = ShardWorker(shard_index, shard_count, id_allocator)
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        name, args = request
+        connection.send(getattr(worker, name)(*args))
+    connection.close()
+
+
+class ShardedLeaderboard:
+    def __init__(self, manager: 'ShardedStudentManager', course: str) -> None:
+        """Initialize a view of a course ranking merged from all shards"""
+        self.manager = manager
+        self.course = course
+
+    def slice(self, offset: int = 0, limit: Optional[int] = None) -> list:
+        """Return up to `limit` (-points, id) keys starting at `offset` of the merged ranking"""
+        stop = offset + limit if limit is not None else None
+        rankings = self.manager.call_all('leaderboard', self.course, stop)
+        return list(islice(heapq.merge(*rankings), offset, stop))
+
+
+class ShardedStudentManager:
+    def __init__(self, workers: int, id_allocator=None) -> None:
+        """Initialize a manager partitioning students by id over `workers` processes, each owning a StudentManager.
+        The id allocator must derive ids from the email, like the default keyed hash, so that lines can be routed.
+        Statistics, course rankings and notifications are merged from per-shard partial results, so a CourseManager
+        can run on top of it."""
+        self.shard_count = workers
+        self.id_allocator = id_allocator if id_allocator is not None else DEFAULT_ID_ALLOCATOR
+        if not getattr(self.id_allocator, 'keyed_on_email', False):
+            raise ValueError('Sharding needs an id allocator that derives ids from the email')
+        self.connections = []
+        self.processes = []
+        for shard_index in range(workers):
+            import multiprocessing
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=run_shard_worker, daemon=True,
+                                              args=(child_connection, shard_index, workers, self.id_allocator,
+                                                    CATALOG))
+            process.start()
+            child_connection.close()
+            self.connections.append(parent_connection)
+            self.processes.append(process)
+        self.leaderboards = {course: ShardedLeaderboard(self, course) for course in COURSES}
+        self.sink: Optional[OutputSink] = None
+        self.history: Optional[SubmissionHistory] = None  # Only kept by single-process managers
+        # Bumped by every import so that cached statistics are fetched from the shards again
+        self.version = 0
+        self.thread_safe = False
+
+    def __enter__(self) -> 'ShardedStudentManager':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the shard processes"""
+        for connection in self.connections:
+            connection.send(None)
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+
+    def call_all(self, name: str, *args) -> list:
+        """Send the same request to every shard and return their results in shard order"""
+        for connection in self.connections:
+            connection.send((name, args))
+        return [connection.recv() for connection in self.connections]
+
+    def call_routed(self, name: str, lines: List[str], shards: List[int]) -> List[str]:
+        """Send every line to its shard in one batch per shard and return the results in line order"""
+        batches: List[List[str]] = [[] for _ in range(self.shard_count)]
+        positions: List[List[int]] = [[] for _ in range(self.shard_count)]
+        for position, (line, shard) in enumerate(zip(lines, shards)):
+            batches[shard].append(line)
+            positions[shard].append(position)
+        # All shards work on their batch concurrently before any result is collected
+        for connection, batch in zip(self.connections, batches):
+            connection.send((name, (batch,)))
+        results = [''] * len(lines)
+        for connection, shard_positions in zip(self.connections, positions):
+            for position, result in zip(shard_positions, connection.recv()):
+                results[position] = result
+        return results
+
+    def student_shard(self, user_input: str) -> int:
+        """Return the shard that owns the email of a credential line"""
+        split_data = StudentManager.user_input_splitter(user_input)
+        if split_data is None:
+            return 0  # Invalid lines are rejected by any shard
+        return self.id_allocator.allocate(split_data[2]) % self.shard_count
+
+    def points_shard(self, user_command: str) -> int:
+        """Return the shard that owns the id of a points line"""
+        parts = user_command.split(None, 1)
+        if parts and parts[0].isdecimal():
+            return int(parts[0]) % self.shard_count
+        return 0  # Lines without a valid id are rejected by any shard
+
+    def import_students(self, lines: Iterable[str]) -> Tuple[int, List[Tuple[int, str]]]:
+        """Add students from lines of credentials on their owning shards.
+        Return the number of added students and a list of (line number, error message) pairs."""
+        numbered = [(line_number, line.strip()) for line_number, line in enumerate(lines, 1) if line.strip()]
+        user_inputs = [user_input for _, user_input in numbered]
+        self.version += 1
+        results = self.call_routed('add_students', user_inputs, [self.student_shard(line) for line in user_inputs])
+        errors = [(line_number, result) for (line_number, _), result in zip(numbered, results) if result != 'Success']
+        return len(results) - len(errors), errors
+
+    def import_points(self, lines: Iterable[str]) -> Tuple[int, List[Tuple[int, str]]]:
+        """Add points from lines of ids and scores on their owning shards.
+        Return the number of applied lines and a list of (line number, error message) pairs."""
+        numbered = [(line_number, line.strip()) for line_number, line in enumerate(lines, 1) if line.strip()]
+        user_commands = [user_command for _, user_command in numbered]
+        self.version += 1
+        results = self.call_routed('add_points', user_commands, [self.points_shard(line) for line in user_commands])
+        errors = [(line_number, result) for (line_number, _), result in zip(numbered, results)
+                  if result != 'Points updated.']
+        return len(results) - len(errors), errors
+
+    @property
+    def course_totals(self) -> CourseTotals:
+        """Course totals merged from the partial totals of every shard"""
+        course_totals = CourseTotals()
+        for enrolled, submissions, points in self.call_all('course_totals'):
+            for course in COURSES:
+                course_totals.enrolled[course] += enrolled[course]
+                course_totals.submissions[course] += submissions[course]
+                course_totals.points[course] += points[course]
+        return course_totals
+
+    def statistics_snapshot(self) -> Tuple[int, CourseTotals]:
+        """Return the version and the course totals merged from every shard"""
+        return self.version, self.course_totals
+
+    def snapshot(self) -> 'ShardedStudentManager':
+        """Return the manager itself, which only changes during imports made by the calling thread"""
+        return self
+
+    def course_ranking(self, course: str, offset: int = 0, limit: Optional[int] = None) -> list:
+        """Return a page of the (-points, id) leaderboard entries of a course merged from every shard"""
+        return self.leaderboards[course].slice(offset, limit)
+
+    def course_distribution(self, course: str) -> CourseDistribution:
+        """Return the points distribution of a course merged from every shard"""
+        distribution = CourseDistribution(COURSE_POINTS_NEEDED[course])
+        for shard_distribution in self.call_all('distribution', course):
+            distribution.merge(shard_distribution)
+        return distribution
+
+    def completed_counts(self) -> dict:
+        """Return the number of students who completed each course, merged from every shard"""
+        counts = {course: 0 for course in COURSES}
+        for shard_counts in self.call_all('completed_counts'):
+            for course in COURSES:
+                counts[course] += shard_counts[course]
+        return counts
+
+    def find_progress(self, student_id: int) -> Optional[dict]:
+        """Return the points of a student from its owning shard"""
+        connection = self.connections[student_id % self.shard_count]
+        connection.send(('find', (student_id,)))
+        return connection.recv()
+
+    def student_ids(self) -> List[int]:
+        """Return the ids of all students, shard by shard"""
+        return [student_id for shard_ids in self.call_all('student_ids') for student_id in shard_ids]
+
+    def notification_records(self, mark_sent: bool = True) -> List[dict]:
+        """Drain the pending notifications of every shard, marking them as sent unless `mark_sent` is False"""
+        return [record for shard_records in self.call_all('notification_records', mark_sent)
+                for record in shard_records]
+
+    def confirm_notifications(self, sent: List[dict], failed: List[Tuple[dict, Optional[Exception]]]) -> None:
+        """Mark delivered notification records as sent and queue the undelivered ones again on their shards"""
+        batches: List[Tuple[List[dict], List[dict]]] = [([], []) for _ in range(self.shard_count)]
+        for record in sent:
+            batches[record['id'] % self.shard_count][0].append(record)
+        for record, _ in failed:
+            batches[record['id'] % self.shard_count][1].append(record)
+        for connection, batch in zip(self.connections, batches):
+            connection.send(('confirm_notifications', batch))
+        for connection in self.connections:
+            connection.recv()
+
+    def output_sink(self) -> OutputSink:
+        """Return the configured output sink or a text sink writing to stdout"""
+        return self.sink if self.sink is not None else TextSink()
+
+
+class SmtpTransport:
+    def __init__(self, host: str, port: int, sender: str, timeout: float = 10.0) -> None:
+        """Initialize a transport delivering notification records over one SMTP connection.
+        The blocking smtplib calls run in worker threads so that many transports can send concurrently."""
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout = timeout
+        self.connection: Optional['smtplib.SMTP'] = None
+
+    def build_message(self, record: dict) -> 'EmailMessage':
+        """Build the email of a notification record"""
+        from email.message import EmailMessage
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = record['email']
+        message['Subject'] = 'Your Learning Progress'
+        message.set_content(f"Hello, {record['name']}! You have accomplished our {record['course']} course!")
+        return message
+
+    async def connect(self) -> None:
+        """Open the SMTP connection"""
+        import asyncio
+        import smtplib
+        self.connection = await asyncio.to_thread(smtplib.SMTP, self.host, self.port, timeout=self.timeout)
+
+    async def send(self, record: dict) -> None:
+        """Send one notification and return once the server accepted it"""
+        import asyncio
+        await asyncio.to_thread(self.connection.send_message, self.build_message(record))
+
+    async def close(self) -> None:
+        """Close the SMTP connection, ignoring errors of an already broken connection"""
+        import asyncio
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            try:
+                await asyncio.to_thread(connection.quit)
+            except OSError:
+                connection.close()
+
+
+class NotificationDispatcher:
+    def __init__(self, transport_factory: Callable[[], object], concurrency: int = 10,
+                 retries: int = 3, retry_delay: float = 0.5) -> None:
+        """Initialize a dispatcher sending notification records over up to `concurrency` connections.
+        Each connection is a transport made by `transport_factory` with async connect, send and close methods.
+        A failed send is retried `retries` times on a fresh connection with exponential backoff; when the
+        connection itself cannot be opened, the rest of the batch fails at once instead of being retried."""
+        self.transport_factory = transport_factory
+        self.concurrency = concurrency
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+    async def dispatch(self, records: List[dict]) -> Tuple[List[dict], List[Tuple[dict, Exception]]]:
+        """Send the records and return the confirmed records in their original order
+        and the (record, error) pairs of the records that could not be delivered"""
+        import asyncio
+        import smtplib
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in enumerate(records):
+            queue.put_nowait(item)
+        sent: List[Tuple[int, dict]] = []
+        failed: List[Tuple[int, dict, Exception]] = []
+
+        async def worker() -> None:
+            transport = self.transport_factory()
+            connected = False
+            try:
+                while not queue.empty():
+                    index, record = queue.get_nowait()
+                    for attempt in range(self.retries + 1):
+                        connecting = not connected
+                        try:
+                            if connecting:
+                                await transport.connect()
+                                connected = True
+                            await transport.send(record)
+                            sent.append((index, record))
+                            break
+                        except (OSError, smtplib.SMTPException) as error:
+                            if connected:
+                                connected = False
+                                await transport.close()
+                            if attempt < self.retries:
+                                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+                                continue
+                            failed.append((index, record, error))
+                            if connecting:
+                                # The server cannot be reached, so the other records would only repeat the retries
+                                while not queue.empty():
+                                    failed.append((*queue.get_nowait(), error))
+                        except Exception as error:
+                            # Not a delivery problem, so another attempt would fail the same way
+                            failed.append((index, record, error))
+                            break
+            finally:
+                if connected:
+                    await transport.close()
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(records)))))
+        return ([record for _, record in sorted(sent, key=lambda item: item[0])],
+                [(record, error) for _, record, error in sorted(failed, key=lambda item: item[0])])
+
+    def send_all(self, records: List[dict]) -> Tuple[List[dict], List[Tuple[dict, Exception]]]:
+        """Run dispatch() to completion from synchronous code"""
+        import asyncio
+        return asyncio.run(self.dispatch(records))
+
+
+def memoized_statistic(function: Callable) -> Callable:
+    """Decorate a CourseManager statistic so that it is only recomputed after the student manager's version
+    changed. The cached result is returned as is and must not be modified by the caller."""
+    @functools.wraps(function)
+    def wrapper(self):
+        # The same as running under consistent_statistics(), without a generator on every cache hit
+        with self.statistics_lock:
+            pinned = self.pinned
+            if pinned is None:
+                self.pinned = self.student_manager.statistics_snapshot()
+            try:
+                version = self.pinned[0]
+                cached = self.statistics_cache.get(function.__name__)
+                if cached is None or cached[0] != version:
+                    cached = self.statistics_cache[function.__name__] = (version, function(self))
+                return cached[1]
+            finally:
+                if pinned is None:
+                    self.pinned = None
+    return wrapper
+
+
 class CourseManager:
     def __init__(self, student_manager: StudentManager) -> None:
         """Initialize the student manager with a set of the available courses and 
         empty dictionaries for popularity, student_activity, and difficulty"""
-        self.courses: set = {'Flask', 'Databases', 'Python', 'DSA'}
+        self.courses: Tuple[str, ...] = COURSES
         self.popularity: dict = {}
         self.student_activity: dict = {}
         self.difficulty: dict = {}
         self.student_manager = student_manager
-    
+        self.dispatcher: Optional[NotificationDispatcher] = None
+        # Statistic name -> (student manager version, result) of its last computation
+        self.statistics_cache: Dict[str, Tuple[int, object]] = {}
+        # (version, course totals) snapshot that the statistics being computed are based on
+        self.pinned: Optional[Tuple[int, CourseTotals]] = None
+        if student_manager.thread_safe:
+            import threading
+            self.statistics_lock = threading.RLock()
+        else:
+            self.statistics_lock = NO_LOCK
+        # (student manager version, report) of the last snapshot course manager
+        self.snapshot_cache: Optional[Tuple[int, 'CourseManager']] = None
+
+    @contextmanager
+    def consistent_statistics(self) -> Iterator[None]:
+        """Base every statistic computed in the block on one snapshot of the course totals.
+        Taking the snapshot does not block writers; concurrent statistics readers wait for each other."""
+        with self.statistics_lock:
+            if self.pinned is not None:
+                yield
+                return
+            self.pinned = self.student_manager.statistics_snapshot()
+            try:
+                yield
+            finally:
+                self.pinned = None
+
+    @profiled('determine_enrolled_students')
     def determine_enrolled_students(self, course) -> list:
         """Determine the enrolled students for a specific course"""
         return list(filter(lambda s: s.is_enrolled_in_course(course), self.student_manager.students))
     
-    def determine_course_popularity(self) -> None:
-        """Determine the popularity of each course and update the self.popularity dictionary"""
-        total_enrollments = 0
-        for course in self.courses:
-            enrolled_students = self.determine_enrolled_students(course)
-            if enrolled_students:
-                self.popularity[course] = len(enrolled_students)
-                total_enrollments += len(enrolled_students)
-            else:
-                self.popularity[course] = 'n/a'
-        if total_enrollments == 0:
-            for course in self.courses:
-                self.popularity[course] = 'n/a'
+    @memoized_statistic
+    @profiled('determine_course_popularity')
+    def determine_course_popularity(self) -> dict:
+        """Determine the popularity of each course, update the self.popularity dictionary and return it"""
+        enrolled = self.pinned[1].enrolled
+        popularity = {course: enrolled[course] if enrolled[course] > 0 else 'n/a' for course in self.courses}
+        self.popularity.update(popularity)
+        return popularity
                 
-    def determine_valid_popularity(self) -> dict:
+    def determine_valid_popularity(self, popularity: Optional[dict] = None) -> dict:
         """Return a dictionary of courses with valid popularity values"""
-        return {course: value for course, value in self.popularity.items() if value != 'n/a'}
+        if popularity is None:
+            popularity = self.popularity
+        return {course: value for course, value in popularity.items() if value != 'n/a'}
 
+    @memoized_statistic
     def most_popular_course(self) -> list:
         """Find the courses with the highest amount of enrolled students"""
-        self.determine_course_popularity()  # Ensure popularity data is up-to-date
-        valid_popularity = self.determine_valid_popularity()
+        popularity = self.determine_course_popularity()  # Ensure popularity data is up-to-date
+        valid_popularity = self.determine_valid_popularity(popularity)
         if not valid_popularity:
             return ['n/a']
         max_value = max(valid_popularity.values())
-        most_popular_courses = [course for course, value in self.popularity.items() if value == max_value]
+        most_popular_courses = [course for course, value in popularity.items() if value == max_value]
         return most_popular_courses
 
+    @memoized_statistic
     def least_popular_course(self) -> list:
         """Find the course with the least amount of enrolled students"""
-        self.determine_course_popularity() # Ensure popularity data is up-to-date
-        valid_popularity = self.determine_valid_popularity()
+        popularity = self.determine_course_popularity()  # Ensure popularity data is up-to-date
+        valid_popularity = self.determine_valid_popularity(popularity)
         if not valid_popularity:
             return ['n/a']
         min_value = min(valid_popularity.values())
-        least_popular_courses = [course for course, val in valid_popularity.items() if val == min_value]
-        most_popular_courses = self.most_popular_course()
-        least_popular_courses = [course for course in least_popular_courses if course not in most_popular_courses]
+        max_value = max(valid_popularity.values())
+        # Courses that are also the most popular are never reported as the least popular
+        least_popular_courses = [course for course, val in valid_popularity.items()
+                                 if val == min_value and val != max_value]
         if not least_popular_courses:
             return ['n/a']
         return least_popular_courses
 
-    def determine_course_activity(self) -> None:
-        """Determine and update the student activity for each course"""
+    @memoized_statistic
+    @profiled('determine_course_activity')
+    def determine_course_activity(self) -> dict:
+        """Determine, update and return the student activity for each course"""
+        submissions = self.pinned[1].submissions
+        activity = {}
         for course in self.courses:
-            total_submissions = sum(s.submissions[course] for s in self.student_manager.students)
+            total_submissions = submissions[course]
             if total_submissions > 0:
-                self.student_activity[course] = total_submissions
+                activity[course] = total_submissions
             else:
-                self.student_activity[course] = 'n/a'
+                activity[course] = 'n/a'
+        self.student_activity.update(activity)
+        return activity
     
-    def determine_valid_activities(self) -> dict:
+    def determine_valid_activities(self, activity: Optional[dict] = None) -> dict:
         """Return a dictionary of courses with valid activity values"""
-        return {course: value for course, value in self.student_activity.items() if value != 'n/a'}
+        if activity is None:
+            activity = self.student_activity
+        return {course: value for course, value in activity.items() if value != 'n/a'}
         
+    @memoized_statistic
     def highest_activity_course(self) -> list:
         """Find the courses with the highest student activity"""
-        self.determine_course_activity()  # Ensure activity is updated
-        valid_activities = self.determine_valid_activities()
+        activity = self.determine_course_activity()  # Ensure activity is updated
+        valid_activities = self.determine_valid_activities(activity)
         if not valid_activities:
             return ['n/a']
         max_value = max(valid_activities.values())
         highest_activity_courses = [course for course, val in valid_activities.items() if val == max_value]
         return highest_activity_courses
 
+    @memoized_statistic
     def lowest_activity_course(self) -> list:
         """Find the courses with the lowest student activity"""
-        self.determine_course_activity()  # Ensure activity is updated
-        valid_activities = self.determine_valid_activities()
+        activity = self.determine_course_activity()  # Ensure activity is updated
+        valid_activities = self.determine_valid_activities(activity)
         if not valid_activities:
             return ['n/a']
         min_value = min(valid_activities.values())
-        lowest_activity_courses = [course for course, val in valid_activities.items() if val == min_value]
-        highest_activity_courses = self.highest_activity_course()
-        lowest_activity_courses = [course for course in lowest_activity_courses if course not in highest_activity_courses]
+        max_value = max(valid_activities.values())
+        lowest_activity_courses = [course for course, val in valid_activities.items()
+                                   if val == min_value and val != max_value]
         if not lowest_activity_courses:
             return ['n/a']
         return lowest_activity_courses
 
-    def determine_course_difficulty(self) -> None:
-        """Determine the difficulty of each course and update the self.difficulty dictionary"""
+    @memoized_statistic
+    @profiled('determine_course_difficulty')
+    def determine_course_difficulty(self) -> dict:
+        """Determine the difficulty of each course, update the self.difficulty dictionary and return it"""
+        course_totals = self.pinned[1]
+        difficulty = {}
         for course in self.courses:
-            total_points = sum(s.progress[course] for s in self.student_manager.students)
-            total_submissions = sum(s.submissions[course] for s in self.student_manager.students)
+            total_points = course_totals.points[course]
+            total_submissions = course_totals.submissions[course]
             if total_submissions > 0:
                 avg_score = total_points / total_submissions
-                self.difficulty[course] = avg_score
+                difficulty[course] = avg_score
             else:
-                self.difficulty[course] = 'n/a'
+                difficulty[course] = 'n/a'
+        self.difficulty.update(difficulty)
+        return difficulty
                 
-    def determine_valid_difficulties(self) -> dict:
+    def determine_valid_difficulties(self, difficulty: Optional[dict] = None) -> dict:
         """Return a dictionary of courses with valid difficulty values"""
-        return {course: avg for course, avg in self.difficulty.items() if avg != 'n/a'}
+        if difficulty is None:
+            difficulty = self.difficulty
+        return {course: avg for course, avg in difficulty.items() if avg != 'n/a'}
 
+    @memoized_statistic
     def easiest_course(self) -> list:
         """Find the courses with the highest average score per submission"""
-        self.determine_course_difficulty()  # Ensure difficulty is updated
-        valid_difficulties = self.determine_valid_difficulties()
+        difficulty = self.determine_course_difficulty()  # Ensure difficulty is updated
+        valid_difficulties = self.determine_valid_difficulties(difficulty)
         if not valid_difficulties:
             return ['n/a']
         max_avg = max(valid_difficulties.values())
         easiest_courses = [course for course, avg in valid_difficulties.items() if avg == max_avg]
         return easiest_courses
     
+    @memoized_statistic
     def hardest_course(self) -> list:
         """Find the courses with the lowest average score per submission"""
-        self.determine_course_difficulty()  # Ensure difficulty is updated
-        valid_difficulties = self.determine_valid_difficulties()
+        difficulty = self.determine_course_difficulty()  # Ensure difficulty is updated
+        valid_difficulties = self.determine_valid_difficulties(difficulty)
         if not valid_difficulties:
             return ['n/a']
         min_avg = min(valid_difficulties.values())
-        hardest_courses = [course for course, avg in valid_difficulties.items() if avg == min_avg]
-        easiest_courses = self.easiest_course()
-        hardest_courses = [course for course in hardest_courses if course not in easiest_courses]
+        max_avg = max(valid_difficulties.values())
+        hardest_courses = [course for course, avg in valid_difficulties.items()
+                           if avg == min_avg and avg != max_avg]
         if not hardest_courses:
             return ['n/a']
         return hardest_courses
     
+    def windowed_totals(self, seconds: float, now: Optional[float] = None) -> CourseTotals:
+        """Return the course totals of the submissions made in the last `seconds`"""
+        history = self.student_manager.history
+        if history is None:
+            raise ValueError('Submission history is not enabled')
+        with self.student_manager.history_lock:
+            return history.window(seconds, now)
+
+    def windowed_popularity(self, seconds: float, now: Optional[float] = None) -> dict:
+        """Return the number of distinct students who submitted to each course in the last `seconds`"""
+        enrolled = self.windowed_totals(seconds, now).enrolled
+        return {course: enrolled[course] if enrolled[course] > 0 else 'n/a' for course in self.courses}
+
+    def windowed_activity(self, seconds: float, now: Optional[float] = None) -> dict:
+        """Return the number of submissions to each course in the last `seconds`"""
+        submissions = self.windowed_totals(seconds, now).submissions
+        return {course: submissions[course] if submissions[course] > 0 else 'n/a' for course in self.courses}
+
+    def windowed_difficulty(self, seconds: float, now: Optional[float] = None) -> dict:
+        """Return the average score per submission of each course in the last `seconds`"""
+        totals = self.windowed_totals(seconds, now)
+        return {course: totals.points[course] / totals.submissions[course] if totals.submissions[course] > 0
+                else 'n/a' for course in self.courses}
+
     def get_completion_percentage(self, course: str, points: int) -> float:
         """Calculate the percentage of completion for a course based on total points"""
-        total_points_needed = {
-            'Python': 600,
-            'DSA' : 400,
-            'Databases': 480,
-            'Flask': 550
-        }
-        return (points / total_points_needed[course]) * 100
+        return completion_percentage(course, points)
                 
-    def display_course_details(self, course: str) -> None:
-        """Display the list of students with their total points"""
-        print(f'{course}')
-        print(f"{'id':<24} {'points':<12} {'completed':<12}")
-        enrolled_students = self.determine_enrolled_students(course)
-        if not enrolled_students:
-            return  # No students enrolled in this course
-        sorted_students = sorted(enrolled_students, key=lambda s: (-s.progress[course], s.student_id))
-        for student in sorted_students:
-            points = student.progress[course]
-            course_completion = self.get_completion_percentage(course, points)
-            print(f'{student.student_id:<24} {points:<12} {course_completion:.1f}%')
+    def course_detail_records(self, course: str, limit: Optional[int] = None, offset: int = 0) -> Iterator[dict]:
+        """Yield the output records of a page of the course ranking"""
+        yield {'type': 'course_header', 'course': course}
+        for negative_points, student_id in self.student_manager.course_ranking(course, offset, limit):
+            points = -negative_points
+            yield {'type': 'course_row', 'course': course, 'id': student_id, 'points': points,
+                   'completed': self.get_completion_percentage(course, points)}
+
+    @profiled('display_course_details')
+    def display_course_details(self, course: str, limit: Optional[int] = None, offset: int = 0) -> None:
+        """Display the list of students with their total points, ranked by points and then id.
+        `limit` and `offset` select one page of the ranking from the incrementally kept leaderboard."""
+        sink = self.student_manager.output_sink()
+        sink.write_all(self.course_detail_records(course, limit, offset))
+        sink.flush()
     
+    def snapshot(self) -> 'CourseManager':
+        """Return a course manager over a point-in-time snapshot of the student manager,
+        for reports that must not mix in writes made while they run.
+        The snapshot is only retaken after the student manager changed, and it shares the statistics cache,
+        whose results are keyed by the version they were computed at."""
+        # Every write that changes a report has bumped the version by the time it returns, so an unchanged
+        # version means that no write finished since the cached snapshot was taken
+        version = self.student_manager.version
+        if self.snapshot_cache is None or self.snapshot_cache[0] != version:
+            student_manager = self.student_manager.snapshot()
+            report = CourseManager(student_manager)
+            report.statistics_cache = self.statistics_cache
+            report.statistics_lock = self.statistics_lock
+            self.snapshot_cache = (student_manager.version, report)
+        return self.snapshot_cache[1]
+
+    @profiled('statistics')
     def course_statistics(self) -> None:
-        """Display course statistics and handle course-specific queries"""
+        """Display course statistics and handle course-specific queries.
+        The rankings and every course query answer from the state when the command started."""
+        report = self.snapshot()
         print("Type the name of a course to see details or 'back' to quit:")
-
-        most_popular = self.most_popular_course()
-        least_popular = self.least_popular_course()
-        highest_activity = self.highest_activity_course()
-        lowest_activity = self.lowest_activity_course()
-        easiest_course = self.easiest_course()
-        hardest_course = self.hardest_course()
-        
-        print(f"Most popular: {', '.join(most_popular)}")
-        print(f"Least popular: {', '.join(least_popular)}")
-        print(f"Highest activity: {', '.join(highest_activity)}")
-        print(f"Lowest activity: {', '.join(lowest_activity)}")
-        print(f"Easiest course: {', '.join(easiest_course)}")
-        print(f"Hardest course: {', '.join(hardest_course)}")
-        
+        report.display_statistics()
         while True:
             user_input = input().strip().lower()
             if user_input.lower() == 'back':
                 break
-            matching_course = next((course for course in self.courses if course.lower() == user_input.lower()), None)
-            if matching_course:
-                self.display_course_details(matching_course)
+            report.display_course_query(user_input)
+
+    @memoized_statistic
+    def completion_counts(self) -> Dict[str, int]:
+        """Return the number of students who completed each course"""
+        return self.student_manager.completed_counts()
+
+    def statistics_summary(self) -> Dict[str, object]:
+        """Return the popularity, activity and difficulty rankings and the completion counts
+        computed from one snapshot"""
+        with self.consistent_statistics():
+            return {
+                'most_popular': self.most_popular_course(),
+                'least_popular': self.least_popular_course(),
+                'highest_activity': self.highest_activity_course(),
+                'lowest_activity': self.lowest_activity_course(),
+                'easiest_course': self.easiest_course(),
+                'hardest_course': self.hardest_course(),
+                'completed': self.completion_counts(),
+            }
+
+    def display_statistics(self) -> None:
+        """Display the popularity, activity and difficulty rankings"""
+        summary = self.statistics_summary()
+        print(f"Most popular: {', '.join(summary['most_popular'])}")
+        print(f"Least popular: {', '.join(summary['least_popular'])}")
+        print(f"Highest activity: {', '.join(summary['highest_activity'])}")
+        print(f"Lowest activity: {', '.join(summary['lowest_activity'])}")
+        print(f"Easiest course: {', '.join(summary['easiest_course'])}")
+        print(f"Hardest course: {', '.join(summary['hardest_course'])}")
+
+    def display_course_query(self, user_input: str) -> None:
+        """Display the details of a `<course> [limit [offset]]` query, the distribution of a
+        `distribution <course>` query or report an unknown course"""
+        words = user_input.split()
+        if words and words[0].lower() == 'distribution':
+            matching_course = CATALOG.find(' '.join(words[1:]))
+            if matching_course in self.courses:
+                for line in self.student_manager.course_distribution(matching_course).records(matching_course):
+                    print(line)
             else:
                 print('Unknown course')
+            return
+        # An optional row limit and offset after the course name select one page of the ranking.
+        # The whole query is tried as a course name first, so names ending in a number stay reachable.
+        for page_length in range(3):
+            if page_length and not (len(words) > page_length and words[-page_length].isdigit()):
+                break
+            matching_course = CATALOG.find(' '.join(words[:len(words) - page_length]))
+            if matching_course in self.courses:
+                page = [int(word) for word in words[len(words) - page_length:]]
+                self.display_course_details(matching_course, *page)
+                return
+        print('Unknown course')
     
+    @profiled('determine_course_completion')
     def determine_course_completion(self, course: str) -> None:
-        """Determine the students who finished a course"""
+        """Scan for students who finished a course without being marked as completed.
+        Points updates already detect completions, so this is only a full consistency check."""
         enrolled_students = self.determine_enrolled_students(course)
         for student in enrolled_students:
             if not student.completed_courses[course]:
                 points = student.progress[course]
                 course_completion = self.get_completion_percentage(course, points)
                 if course_completion >= 100:
-                    student.completed_courses[course] = True
+                    self.student_manager.mark_completed(student, course)
     
+    def notification_records(self, mark_sent: bool = True) -> Iterable[dict]:
+        """Drain the completions queued since the last call into notification records,
+        marking each as sent unless `mark_sent` is False"""
+        return self.student_manager.notification_records(mark_sent)
+
+    def confirm_notifications(self, sent: List[dict], failed: List[Tuple[dict, Optional[Exception]]]) -> None:
+        """Mark delivered notification records as sent and queue the undelivered ones again"""
+        self.student_manager.confirm_notifications(sent, failed)
+
+    @profiled('notify')
     def notify_students(self) -> None:
         """Sends course completion notifications to students who completed a course"""
-        notifications_sent = 0
         notified_students = set()
-        
-        for course in self.courses:
-            self.determine_course_completion(course)
-        
-        for student in self.student_manager.students:
-            for course in self.courses:
-                if student.completed_courses[course] and not student.notifications_sent[course]:
-                    print(f'To: {student.email}')
-                    print('Re: Your Learning Progress')
-                    full_name = f'{student.first_name} {student.last_name}'
-                    print(f'Hello, {full_name}! You have accomplished our {course} course!')
-                    student.notifications_sent[course] = True
-                    if student.student_id not in notified_students:
-                        notified_students.add(student.student_id)
-                        notifications_sent += 1
-        print(f"Total {notifications_sent} student{'s' if notifications_sent != 1 else ''} have been notified.")
+        sink = self.student_manager.output_sink()
+        if self.dispatcher is None:
+            for record in self.notification_records():
+                sink.write(record)
+                notified_students.add(record['id'])
+        else:
+            records = list(self.notification_records(mark_sent=False))
+            outcome = None
+            try:
+                outcome = self.dispatcher.send_all(records)
+            finally:
+                if outcome is None:
+                    # Delivery was interrupted: nothing is marked as sent and every record is queued again
+                    self.confirm_notifications([], [(record, None) for record in records])
+            sent, failed = outcome
+            self.confirm_notifications(sent, failed)
+            for record in sent:
+                sink.write(record)
+                notified_students.add(record['id'])
+            if failed:
+                sink.write({'type': 'message', 'text': f'Failed to deliver {len(failed)} notifications.'})
+        notifications_sent = len(notified_students)
+        sink.write({'type': 'message',
+                    'text': f"Total {notifications_sent} student{'s' if notifications_sent != 1 else ''} "
+                            f"have been notified."})
+        sink.flush()
             
 
-def main() -> None:
+class TrackerService:
+    WRITE_CHUNK = 1000
+    REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               500: 'Internal Server Error'}
+
+    def __init__(self, manager: StudentManager, course_manager: CourseManager) -> None:
+        """Initialize an HTTP/JSON front-end over a student manager and its course manager.
+        Mutations are serialized by a lock and applied in chunks, so reads are served between chunks."""
+        import asyncio
+        self.manager = manager
+        self.course_manager = course_manager
+        self.write_lock = asyncio.Lock()
+        self.server: Optional['asyncio.AbstractServer'] = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8000) -> None:
+        """Start listening; with port 0 the chosen port is available as self.port"""
+        import asyncio
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host: str = '127.0.0.1', port: int = 8000) -> None:
+        """Start listening and serve requests until cancelled"""
+        await self.start(host, port)
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def handle_connection(self, reader: 'asyncio.StreamReader', writer: 'asyncio.StreamWriter') -> None:
+        """Serve the requests of one keep-alive HTTP/1.1 connection"""
+        import asyncio
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    header_line = await reader.readline()
+                    if header_line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header_line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    content_length = int(headers.get('content-length', 0))
+                    if content_length < 0:
+                        raise ValueError(content_length)
+                except ValueError:
+                    # Without a valid length the end of the body is unknown, so the connection cannot be reused
+                    await self.respond(writer, 400, {'error': 'Invalid Content-Length header'})
+                    break
+                body = await reader.readexactly(content_length)
+                try:
+                    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                    status, payload = await self.route(method, target, body.decode())
+                except ValueError as error:
+                    status, payload = 400, {'error': str(error)}
+                await self.respond(writer, status, payload)
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer: 'asyncio.StreamWriter', status: int, payload: object) -> None:
+        """Write one JSON response"""
+        content = json.dumps(payload).encode()
+        writer.write(f'HTTP/1.1 {status} {self.REASONS[status]}\r\n'
+                     f'Content-Type: application/json\r\nContent-Length: {len(content)}\r\n\r\n'
+                     .encode() + content)
+        await writer.drain()
+
+    async def route(self, method: str, target: str, body: str) -> Tuple[int, object]:
+        """Dispatch a request to its endpoint and return the status and the JSON payload"""
+        import urllib.parse
+        path, _, query = target.partition('?')
+        parts = tuple(part for part in path.split('/') if part)
+        if parts == ('statistics',) and method == 'GET' and query:
+            return await self.windowed_statistics(urllib.parse.parse_qs(query))
+        if parts == ('students',) and method == 'GET' and query:
+            return await self.search_students(urllib.parse.parse_qs(query))
+        if len(parts) == 2 and parts[0] in ('students', 'courses'):
+            if method != 'GET':
+                return 405, {'error': 'Method not allowed'}
+            if parts[0] == 'students':
+                return await self.find_student(parts[1])
+            return await self.course_details(parts[1], urllib.parse.parse_qs(query))
+        endpoints = {
+            ('students',): {'GET': self.list_students, 'POST': self.add_students},
+            ('points',): {'POST': self.add_points},
+            ('statistics',): {'GET': self.statistics},
+            ('notify',): {'POST': self.notify},
+        }.get(parts)
+        if endpoints is None:
+            return 404, {'error': 'Unknown endpoint'}
+        if method not in endpoints:
+            return 405, {'error': 'Method not allowed'}
+        return await endpoints[method](body)
+
+    async def apply_in_chunks(self, function: Callable[[List[str]], Tuple[int, list]], body: str) -> dict:
+        """Apply a batch import under the write lock, yielding to readers between chunks of lines"""
+        import asyncio
+        lines = body.splitlines()
+        applied, errors = 0, []
+        async with self.write_lock:
+            for start in range(0, len(lines), self.WRITE_CHUNK):
+                chunk_applied, chunk_errors = function(lines[start:start + self.WRITE_CHUNK])
+                applied += chunk_applied
+                errors.extend((line_number + start, message) for line_number, message in chunk_errors)
+                await asyncio.sleep(0)
+        return {'applied': applied, 'errors': errors}
+
+    async def add_students(self, body: str) -> Tuple[int, dict]:
+        """POST /students with one line of credentials per student"""
+        return 200, await self.apply_in_chunks(self.manager.import_students, body)
+
+    async def add_points(self, body: str) -> Tuple[int, dict]:
+        """POST /points with one line of id and scores per submission"""
+        return 200, await self.apply_in_chunks(self.manager.import_points, body)
+
+    async def list_students(self, body: str) -> Tuple[int, dict]:
+        """GET /students"""
+        return 200, {'ids': [student.student_id for student in self.manager.students]}
+
+    async def search_students(self, query: dict) -> Tuple[int, dict]:
+        """GET /students?email=<address> or /students?name=<prefix>[&limit=<n>]"""
+        if 'email' in query:
+            student = self.manager.find_student_by_email(query['email'][0])
+            students = [student] if student is not None else []
+        elif 'name' in query:
+            try:
+                limit = int(query['limit'][0]) if 'limit' in query else None
+            except ValueError:
+                limit = -1
+            if limit is not None and limit < 0:
+                return 400, {'error': 'Expected limit=<n> with a non-negative integer'}
+            students = self.manager.find_students_by_name(query['name'][0], limit)
+        else:
+            return 400, {'error': 'Expected email=<address> or name=<prefix>'}
+        return 200, {'students': [{'id': student.student_id, 'first_name': student.first_name,
+                                   'last_name': student.last_name, 'email': student.email} for student in students]}
+
+    async def find_student(self, student_id: str) -> Tuple[int, dict]:
+        """GET /students/<id>"""
+        student = self.manager.find_student_by_id(int(student_id)) if student_id.isdecimal() else None
+        if student is None:
+            return 404, {'error': f'No student is found for id={student_id}.'}
+        return 200, {'id': student.student_id, 'points': dict(student.progress)}
+
+    async def course_details(self, course_name: str, query: dict) -> Tuple[int, dict]:
+        """GET /courses/<course>?limit=<n>&offset=<n>"""
+        course = CATALOG.find(course_name)
+        if course is None:
+            return 404, {'error': 'Unknown course'}
+        try:
+            limit = int(query['limit'][0]) if 'limit' in query else None
+            offset = int(query['offset'][0]) if 'offset' in query else 0
+        except ValueError:
+            limit = offset = -1
+        if (limit is not None and limit < 0) or offset < 0:
+            return 400, {'error': 'Expected limit=<n>&offset=<n> with non-negative integers'}
+        records = self.course_manager.course_detail_records(course, limit, offset)
+        next(records)  # The header is only needed for text output
+        return 200, {'course': course, 'students': [
+            {'id': record['id'], 'points': record['points'], 'completed': record['completed']} for record in records]}
+
+    async def statistics(self, body: str) -> Tuple[int, dict]:
+        """GET /statistics"""
+        return 200, self.course_manager.statistics_summary()
+
+    async def windowed_statistics(self, query: dict) -> Tuple[int, dict]:
+        """GET /statistics?window=<seconds>"""
+        if self.manager.history is None:
+            return 404, {'error': 'Submission history is not enabled'}
+        try:
+            seconds = float(query['window'][0])
+        except (KeyError, ValueError):
+            return 400, {'error': 'Expected window=<seconds>'}
+        course_manager = self.course_manager
+        return 200, {
+            'window': seconds,
+            'popularity': course_manager.windowed_popularity(seconds),
+            'activity': course_manager.windowed_activity(seconds),
+            'difficulty': course_manager.windowed_difficulty(seconds),
+        }
+
+    async def notify(self, body: str) -> Tuple[int, dict]:
+        """POST /notify, delivering through the course manager's dispatcher when one is configured"""
+        async with self.write_lock:
+            dispatcher = self.course_manager.dispatcher
+            records = list(self.course_manager.notification_records(mark_sent=dispatcher is None))
+            failed = []
+            if dispatcher is not None:
+                outcome = None
+                try:
+                    outcome = await dispatcher.dispatch(records)
+                except Exception as error:
+                    return 500, {'error': f'Notification delivery failed: {error}'}
+                finally:
+                    if outcome is None:
+                        # Delivery was interrupted or cancelled: every record is queued again
+                        self.course_manager.confirm_notifications([], [(record, None) for record in records])
+                records, failed = outcome
+                self.course_manager.confirm_notifications(records, failed)
+        return 200, {'notifications': records, 'failed': len(failed),
+                     'students': len({record['id'] for record in records})}
+
+
+def read_import_file(path: str) -> Iterator[str]:
+    """Yield the lines of a bulk import file through a buffered reader.
+    CSV files have their fields joined with spaces to match the interactive input format."""
+    with open(path, newline='', buffering=1 << 20) as file:
+        if path.lower().endswith('.csv'):
+            import csv
+            for row in csv.reader(file):
+                yield ' '.join(field.strip() for field in row)
+        else:
+            yield from file
+
+
+def print_import_report(imported: int, errors: List[Tuple[int, str]], label: str) -> None:
+    """Print the errors of a bulk import followed by a one-line summary."""
+    for line_number, message in errors:
+        print(f'line {line_number}: {message}')
+    print(f'Total {imported} {label}, {len(errors)} rejected')
+
+
+ONE_SHOT_COMMANDS = ('find', 'list', 'statistics', 'notify')
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> 'argparse.Namespace':
+    """Parse the command line options of the tracker."""
+    import argparse
+    parser = argparse.ArgumentParser(description='Learning Progress Tracker')
+    parser.add_argument('command', nargs='?', choices=ONE_SHOT_COMMANDS,
+                        help='run a single command against --data-dir and exit instead of starting the prompt')
+    parser.add_argument('arguments', nargs='*',
+                        help="student ids, 'email ADDRESS' or 'name PREFIX' for find, "
+                             'or a course with an optional limit and offset for statistics')
+    parser.add_argument('--courses', metavar='FILE',
+                        help='load the course catalog from a JSON file of course names and points needed')
+    parser.add_argument('--import-students', metavar='FILE',
+                        help='bulk load student credentials from a line or CSV file')
+    parser.add_argument('--import-points', metavar='FILE',
+                        help='bulk load points from a line or CSV file')
+    parser.add_argument('--data-dir', metavar='DIR',
+                        help='persist students and points in a snapshot and journal kept in this directory')
+    parser.add_argument('--output', metavar='FILE',
+                        help='write listings and notifications to a file instead of stdout')
+    parser.add_argument('--output-format', choices=('text', 'jsonl'), default='text',
+                        help='write listings and notifications as text or as JSON lines')
+    parser.add_argument('--smtp', metavar='HOST:PORT',
+                        help='deliver notifications through this SMTP server in addition to printing them')
+    parser.add_argument('--smtp-sender', default='tracker@localhost',
+                        help='sender address of notification emails')
+    parser.add_argument('--smtp-connections', type=int, default=10,
+                        help='maximum number of concurrent SMTP connections')
+    parser.add_argument('--serve', metavar='HOST:PORT',
+                        help='serve the tracker as an HTTP/JSON service instead of the interactive prompt')
+    parser.add_argument('--history-days', type=float, metavar='DAYS',
+                        help='keep an hourly history of the submissions of the last DAYS days for windowed statistics')
+    parser.add_argument('--profile', metavar='FILE', default=os.environ.get('LPT_PROFILE'),
+                        help='record wall time, calls and allocations per command and write them as JSON '
+                             '(also enabled by the LPT_PROFILE environment variable)')
+    parser.add_argument('--profile-stats', metavar='FILE',
+                        help='also collect a cProfile trace of the whole run and write it in pstats format')
+    parser.add_argument('--batch', action='store_true',
+                        help='exit after the bulk imports instead of starting the interactive prompt')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     """Main function to handle the program execution."""
-    print("Learning Progress Tracker")
+    global PROFILER
+    args = parse_arguments(argv)
+    if args.profile or args.profile_stats:
+        PROFILER = CommandProfiler(use_cprofile=args.profile_stats is not None)
+        PROFILER.start()
+        try:
+            run_tracker(args)
+        finally:
+            PROFILER.stop()
+            if args.profile:
+                PROFILER.dump_json(args.profile)
+            if args.profile_stats:
+                PROFILER.dump_stats(args.profile_stats)
+            PROFILER = None
+    else:
+        run_tracker(args)
+
+
+def run_tracker(args: 'argparse.Namespace') -> None:
+    """Set up the tracker from the command line options and run it."""
+    if args.command is None:
+        print("Learning Progress Tracker")
+    if args.courses:
+        use_catalog(CourseCatalog.from_file(args.courses))
     manager = StudentManager()
     course = CourseManager(manager)
+    store = None
+    if args.data_dir:
+        store = TrackerStore(args.data_dir)
+        store.load(manager)
+    if args.history_days:
+        # Enabled after loading so that replayed journal records are not taken for new submissions
+        manager.history = SubmissionHistory(retention=args.history_days * 86400)
+    output = open(args.output, 'a', buffering=1 << 16) if args.output else None
+    if output is not None or args.output_format != 'text':
+        sink_class = JsonlSink if args.output_format == 'jsonl' else TextSink
+        manager.sink = sink_class(output)
+    if args.smtp:
+        host, _, port = args.smtp.rpartition(':')
+        course.dispatcher = NotificationDispatcher(
+            lambda: SmtpTransport(host, int(port), args.smtp_sender), concurrency=args.smtp_connections)
+    try:
+        run_commands(args, manager, course)
+    finally:
+        if store is not None:
+            store.close()
+        if output is not None:
+            output.close()
+
+
+def run_commands(args: 'argparse.Namespace', manager: StudentManager, course: CourseManager) -> None:
+    """Run the bulk imports and the interactive command loop."""
+    if args.import_students:
+        added, errors = manager.import_students(read_import_file(args.import_students))
+        print_import_report(added, errors, 'students were added')
+    if args.import_points:
+        updated, errors = manager.import_points(read_import_file(args.import_points))
+        print_import_report(updated, errors, 'point records were applied')
+    if args.command is not None:
+        run_one_shot(args.command, args.arguments, manager, course)
+        return
+    if args.batch:
+        return
+    if args.serve:
+        host, _, port = args.serve.rpartition(':')
+        print(f'Serving on http://{host}:{port}')
+        import asyncio
+        try:
+            asyncio.run(TrackerService(manager, course).serve_forever(host, int(port)))
+        except KeyboardInterrupt:
+            pass
+        return
 
     while True:
         user_command = input().strip().lower()
@@ -437,5 +2905,24 @@ def main() -> None:
             print('Error: unknown command')
 
 
+def run_one_shot(command: str, arguments: List[str], manager: StudentManager, course: CourseManager) -> None:
+    """Run one command with its arguments given on the command line."""
+    if command == 'find':
+        # Either one email or name query, or any number of ids
+        queries = [' '.join(arguments)] if arguments and arguments[0] in ('email', 'name') else arguments
+        for user_command in queries:
+            for line in manager.student_query(user_command):
+                print(line)
+    elif command == 'list':
+        manager.list_student_ids()
+    elif command == 'statistics':
+        if arguments:
+            course.display_course_query(' '.join(arguments))
+        else:
+            course.display_statistics()
+    elif command == 'notify':
+        course.notify_students()
+
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,7 +1,14 @@
 import unittest
 import builtins
+import contextlib
+import io
+import learning_progress_tracker
 from typing import Optional, Tuple
-from learning_progress_tracker import Student, StudentManager, CourseManager
+from learning_progress_tracker import (Student, StudentManager, CourseManager, TrackerStore, SortedList,
+                                       TextSink, JsonlSink, NotificationDispatcher, SmtpTransport,
+                                       KeyedHashIdAllocator, CounterIdAllocator, ShardedStudentManager,
+                                       TrackerService, SubmissionHistory, CourseCatalog, PointsSketch,
+                                       read_import_file, validate_many, main)
 
 class TestStudent(unittest.TestCase):
     """Tests for the Student class."""
@@ -33,6 +40,18 @@ class TestStudent(unittest.TestCase):
         self.assertFalse(Student.is_email_valid('john.doe@com'))
         self.assertFalse(Student.is_email_valid('john.doe@.com'))
 
+    def test_validate_many(self):
+        """Test batch validation reports the first invalid field of every row."""
+        rows = [
+            ('John', 'Doe', 'john.doe@example.com'),
+            ('J', 'Doe', 'bad'),
+            ('John', 'Van Der Berg', 'john@example'),
+            ('John', 'Van D', 'john@example.com'),
+            ('Anne-Marie', "O'Connor", 'anne@example.co.uk'),
+        ]
+        self.assertEqual(validate_many(rows), [None, 'Incorrect first name.', 'Incorrect email.',
+                                               'Incorrect last name.', None])
+
     def test_update_points_and_submissions(self):
         """Test updating points and submissions for a student."""
         student = Student('John', 'Doe', 'john.doe@example.com')
@@ -55,6 +74,103 @@ class TestStudent(unittest.TestCase):
         self.assertTrue(student.is_enrolled_in_course('Databases'))
         self.assertFalse(student.is_enrolled_in_course('DSA'))
 
+    def test_course_views(self):
+        """Test that the course attributes are writable views over the student's row."""
+        student = Student('John', 'Doe', 'john.doe@example.com')
+        self.assertFalse(hasattr(student, '__dict__'))
+        student.completed_courses['DSA'] = True
+        self.assertTrue(student.completed_courses['DSA'])
+        self.assertEqual(student.columns.completed_courses[1][student.row], 1)
+        self.assertEqual(dict(student.progress), {'Python': 0, 'DSA': 0, 'Databases': 0, 'Flask': 0})
+        with self.assertRaises(KeyError):
+            student.progress['Java']
+
+class TestSortedList(unittest.TestCase):
+    """Tests for the SortedList class."""
+
+    def test_matches_sorted(self):
+        """Test that random inserts and removals keep the keys sorted across bucket splits."""
+        import random
+        SortedList.BUCKET_SIZE = 4
+        self.addCleanup(setattr, SortedList, 'BUCKET_SIZE', 512)
+        keys = SortedList()
+        expected = []
+        for _ in range(500):
+            key = (random.randint(-50, 0), random.randint(1, 1000))
+            if expected and random.random() < 0.3:
+                key = random.choice(expected)
+                keys.remove(key)
+                expected.remove(key)
+            else:
+                keys.add(key)
+                expected.append(key)
+            expected.sort()
+            # Positional lookups between changes keep the index of bucket lengths up to date
+            offset = random.randint(0, len(expected))
+            self.assertEqual(keys.slice(offset, 6), expected[offset:offset + 6])
+        self.assertEqual(list(keys), expected)
+        self.assertEqual(len(keys), len(expected))
+        self.assertEqual(keys.slice(10, 7), expected[10:17])
+        self.assertEqual(keys.slice(len(expected) - 2), expected[-2:])
+        middle = expected[len(expected) // 2]
+        self.assertEqual(list(keys.irange(middle)), [key for key in expected if key >= middle])
+        self.assertEqual(list(keys.irange((1,))), [])
+        with self.assertRaises(ValueError):
+            keys.remove((1, 1))
+
+    def test_snapshot(self):
+        """Test that snapshots keep their keys while the list and other snapshots change."""
+        import random
+        rng = random.Random(5)
+        SortedList.BUCKET_SIZE = 4
+        self.addCleanup(setattr, SortedList, 'BUCKET_SIZE', 512)
+        keys = SortedList()
+        expected = []
+        snapshots = []
+        for step in range(600):
+            if expected and rng.random() < 0.4:
+                key = rng.choice(expected)
+                keys.remove(key)
+                expected.remove(key)
+            else:
+                key = (rng.randint(-50, 0), step)
+                keys.add(key)
+                expected.append(key)
+            if step % 100 == 0:
+                snapshots.append((keys.snapshot(), sorted(expected)))
+            offset = rng.randint(0, len(expected))
+            self.assertEqual(keys.slice(offset, 5), sorted(expected)[offset:offset + 5])
+        self.assertEqual(list(keys), sorted(expected))
+        for snapshot, snapshot_keys in snapshots:
+            self.assertEqual(list(snapshot), snapshot_keys)
+            self.assertEqual(snapshot.slice(3, 5), snapshot_keys[3:8])
+            self.assertEqual(snapshot.slice(len(snapshot_keys) - 4), snapshot_keys[-4:])
+        changed, changed_keys = snapshots[-1]
+        changed.add((1, 0))
+        self.assertEqual(list(changed), changed_keys + [(1, 0)])
+        self.assertEqual(list(keys), sorted(expected))
+
+    def test_update(self):
+        """Test that small and large batches of keys merge into the list without touching snapshots."""
+        import random
+        rng = random.Random(7)
+        SortedList.BUCKET_SIZE = 4
+        self.addCleanup(setattr, SortedList, 'BUCKET_SIZE', 512)
+        keys = SortedList()
+        expected = []
+        for batch_size in (50, 2, 200, 1):
+            snapshot, snapshot_keys = keys.snapshot(), list(expected)
+            batch = [(rng.randint(-50, 0), rng.randint(1, 1000)) for _ in range(batch_size)]
+            keys.update(batch)
+            expected = sorted(expected + batch)
+            self.assertEqual(list(keys), expected)
+            self.assertEqual(len(keys), len(expected))
+            self.assertEqual(list(snapshot), snapshot_keys)
+        keys.remove(expected.pop(3))
+        keys.add((1, 0))
+        self.assertEqual(list(keys), expected + [(1, 0)])
+
+
 class TestStudentManager(unittest.TestCase):
     """Tests for the StudentManager class."""
 
@@ -131,6 +247,35 @@ class TestStudentManager(unittest.TestCase):
         student = self.manager.find_student_by_id(99999)
         self.assertIsNone(student)
 
+    def test_remove_student(self):
+        """Test that removing a student keeps the id and email indexes consistent."""
+        self.manager.add_student('John', 'Doe', 'john.doe@example.com')
+        student_id = self.manager.students[0].student_id
+        self.assertTrue(self.manager.remove_student(student_id))
+        self.assertIsNone(self.manager.find_student_by_id(student_id))
+        self.assertEqual(self.manager.students, [])
+        self.assertFalse(self.manager.remove_student(student_id))
+        # The email can be registered again after removal
+        self.assertEqual(self.manager.add_student('John', 'Doe', 'john.doe@example.com'), 'Success')
+        self.assertIs(self.manager.find_student_by_id(student_id), self.manager.students[0])
+
+    def test_shared_columns(self):
+        """Test that managed students share the manager's columns and keep their data after removal."""
+        self.manager.add_student('John', 'Doe', 'john.doe@example.com')
+        self.manager.add_student('Jane', 'Smith', 'jane.smith@example.com')
+        john, jane = self.manager.students
+        self.assertIs(john.columns, self.manager.columns)
+        self.assertEqual((john.row, jane.row), (0, 1))
+        john.update_points((10, 0, 0, 0))
+        self.manager.remove_student(john.student_id)
+        self.assertEqual(john.progress['Python'], 10)
+        # The freed row is reused for the next student and starts empty
+        self.manager.add_student('Alice', 'Smith', 'alice.smith@example.com')
+        alice = self.manager.students[-1]
+        self.assertEqual(alice.row, 0)
+        self.assertEqual(alice.progress['Python'], 0)
+        self.assertEqual(john.progress['Python'], 10)
+
     def test_add_points(self):
         """Test adding points to a student."""
         self.manager.add_student('John', 'Doe', 'john.doe@example.com')
@@ -165,6 +310,406 @@ class TestStudentManager(unittest.TestCase):
         self.assertEqual(student.progress, {'Python': 10, 'DSA': 20, 'Databases': 30, 'Flask': 40})
         self.assertEqual(student.submissions, {'Python': 1, 'DSA': 1, 'Databases': 1, 'Flask': 1})
 
+    def test_stable_ids(self):
+        """Test that ids do not depend on the per-process string hash seed."""
+        import os
+        import subprocess
+        import sys
+        code = ('from learning_progress_tracker import Student; '
+                'print(Student("John", "Doe", "john.doe@example.com").student_id)')
+        ids = {subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)),
+                              env={**os.environ, 'PYTHONHASHSEED': seed}).stdout.strip()
+               for seed in ('1', '2')}
+        self.assertEqual(ids, {str(KeyedHashIdAllocator().allocate('john.doe@example.com'))})
+        self.assertLess(int(ids.pop()), 1 << 63)
+
+    def test_id_collisions(self):
+        """Test that an id already in the index is never handed out twice."""
+        class CollidingAllocator(KeyedHashIdAllocator):
+            def allocate(self, email, attempt=0):
+                return 42 if attempt == 0 else super().allocate(email, attempt)
+
+        manager = StudentManager(CollidingAllocator())
+        manager.add_student('John', 'Doe', 'john.doe@example.com')
+        manager.add_student('Jane', 'Smith', 'jane.smith@example.com')
+        john, jane = manager.students
+        self.assertEqual(john.student_id, 42)
+        self.assertNotEqual(jane.student_id, 42)
+        self.assertIs(manager.find_student_by_id(jane.student_id), jane)
+
+    def test_counter_ids(self):
+        """Test consecutive ids that continue after restored ones."""
+        manager = StudentManager(CounterIdAllocator(start=100))
+        manager.add_student('John', 'Doe', 'john.doe@example.com')
+        manager.restore_student(500, 'Jane', 'Smith', 'jane.smith@example.com')
+        manager.add_student('Alice', 'Smith', 'alice.smith@example.com')
+        self.assertEqual([student.student_id for student in manager.students], [100, 500, 501])
+
+    def test_import_students(self):
+        """Test bulk importing students with an error report."""
+        lines = [
+            'John Doe john.doe@example.com\n',
+            '\n',
+            'Jane D jane.d@example.com\n',
+            'JohnDoe\n',
+            'Jane Doe john.doe@example.com\n',
+            'Alice Smith alice.smith@example.com\n',
+        ]
+        added, errors = self.manager.import_students(lines)
+        self.assertEqual(added, 2)
+        self.assertEqual(errors, [(3, 'Incorrect last name.'), (4, 'Incorrect credentials.'),
+                                  (5, 'This email is already taken.')])
+        self.assertEqual(len(self.manager.students), 2)
+
+    def test_import_students_matches_adding(self):
+        """Test that a bulk import gives the ids, indexes and journal of adding the students one by one."""
+        import tempfile
+        lines = ['Alice Smith alice@example.com', 'Bob Smith bob@example.com', 'Bob B bob.b@example.com',
+                 'Carol Jones alice@example.com', 'Dan Alison dan@example.com', 'Eve Eve eve@example.com']
+        with tempfile.TemporaryDirectory() as directory:
+            store = TrackerStore(directory)
+            store.load(self.manager)
+            self.manager.add_student('Alison', 'Moore', 'alison@example.com')
+            self.assertEqual(self.manager.import_students(lines), (4, [(3, 'Incorrect last name.'),
+                                                                        (4, 'This email is already taken.')]))
+            store.close()
+            restored = StudentManager()
+            TrackerStore(directory).load(restored)
+        expected = StudentManager()
+        expected.add_student('Alison', 'Moore', 'alison@example.com')
+        for line in lines:
+            expected.add_student_from_input(line)
+        for manager in (self.manager, restored):
+            self.assertEqual([(student.student_id, student.email) for student in manager.students],
+                             [(student.student_id, student.email) for student in expected.students])
+            self.assertEqual(list(manager.name_index), list(expected.name_index))
+            self.assertEqual([student.student_id for student in manager.find_students_by_name('ali')],
+                             [student.student_id for student in expected.find_students_by_name('ali')])
+            self.assertEqual(len(manager.find_students_by_name('ali')), 3)
+
+    def test_import_points(self):
+        """Test bulk importing points with the interactive error messages."""
+        self.manager.add_student('John', 'Doe', 'john.doe@example.com')
+        student = self.manager.students[0]
+        lines = [
+            f'{student.student_id} 10 20 30 40',
+            f'{student.student_id} 10 20 30',
+            'abc 1 2 3 4',
+            f'{student.student_id} 1 -2 3 4',
+            f'{student.student_id} 5 0 0 0',
+        ]
+        updated, errors = self.manager.import_points(lines)
+        self.assertEqual(updated, 2)
+        self.assertEqual(errors, [(2, 'Incorrect points format'), (3, 'No student is found for id=abc.'),
+                                  (4, 'Incorrect points format')])
+        self.assertEqual(student.progress, {'Python': 15, 'DSA': 20, 'Databases': 30, 'Flask': 40})
+        self.assertEqual(student.submissions, {'Python': 2, 'DSA': 1, 'Databases': 1, 'Flask': 1})
+
+    def test_apply_points_batch(self):
+        """Test that a batch of points lines leaves the same state as applying them one by one."""
+        managers = [StudentManager(), StudentManager()]
+        for manager in managers:
+            for name in ('john', 'jane', 'alice'):
+                manager.add_student(name.title(), 'Doe', f'{name}@example.com')
+            manager.students[0].update_points((590, 0, 0, 0))
+        john, jane, alice = (student.student_id for student in managers[0].students)
+        lines = [f'{jane} 300 0 0 0', f'{john} 5 7 0 0', '1 2 3', f'{jane} 300 0 0 0', f'{alice} 0 0 0 0',
+                 f'{john} 5 0 0 1', f'{jane} 1 -1 0 0', '42 1 1 1 1', f'{alice} 0 400 0 0']
+        messages = [managers[0].add_points_from_input(line) for line in lines]
+        self.assertEqual(managers[1].apply_points_batch(lines), messages)
+        sequential, batched = managers
+        for expected, student in zip(sequential.students, batched.students):
+            self.assertEqual(student.progress, expected.progress)
+            self.assertEqual(student.submissions, expected.submissions)
+            self.assertEqual(student.completed_courses, expected.completed_courses)
+        self.assertEqual(batched.course_totals.enrolled, sequential.course_totals.enrolled)
+        self.assertEqual(batched.course_totals.submissions, sequential.course_totals.submissions)
+        self.assertEqual(batched.course_totals.points, sequential.course_totals.points)
+        self.assertEqual(list(batched.leaderboards['Python']), list(sequential.leaderboards['Python']))
+        # Completions are queued in line order: Jane, then John, then Alice
+        self.assertEqual([(student.student_id, course) for student, course in batched.pending_notifications],
+                         [(jane, 'Python'), (john, 'Python'), (alice, 'DSA')])
+
+    def test_read_import_file(self):
+        """Test reading line and CSV import files."""
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'students.csv')
+            with open(csv_path, 'w') as file:
+                file.write('John,Doe,john.doe@example.com\nJane, Smith Jones ,jane@example.com\n')
+            self.assertEqual(list(read_import_file(csv_path)),
+                             ['John Doe john.doe@example.com', 'Jane Smith Jones jane@example.com'])
+            text_path = os.path.join(directory, 'students.txt')
+            with open(text_path, 'w') as file:
+                file.write('John Doe john.doe@example.com\n')
+            self.assertEqual(list(read_import_file(text_path)), ['John Doe john.doe@example.com\n'])
+
+    def test_main_batch_import(self):
+        """Test the non-interactive bulk import entry point."""
+        import os
+        import sys
+        import tempfile
+        from io import StringIO
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'students.txt')
+            with open(path, 'w') as file:
+                file.write('John Doe john.doe@example.com\nJane D jane@example.com\n')
+            captured_output = StringIO()
+            sys.stdout = captured_output
+            try:
+                main(['--import-students', path, '--batch'])
+            finally:
+                sys.stdout = sys.__stdout__
+        output = captured_output.getvalue()
+        self.assertIn('line 2: Incorrect last name.', output)
+        self.assertIn('Total 1 students were added, 1 rejected', output)
+
+    def test_main_one_shot(self):
+        """Test running single commands against a data directory without the prompt."""
+        import sys
+        import tempfile
+        from io import StringIO
+        with tempfile.TemporaryDirectory() as directory:
+            manager = StudentManager()
+            store = TrackerStore(directory)
+            store.load(manager)
+            manager.add_student('John', 'Doe', 'john.doe@example.com')
+            john_id = manager.students[0].student_id
+            manager.students[0].update_points((10, 0, 0, 0))
+            store.close()
+            outputs = []
+            for argv in (['find', str(john_id), 'x'], ['statistics'], ['statistics', 'python', '1']):
+                sys.stdout = StringIO()
+                try:
+                    main([*argv, '--data-dir', directory])
+                    outputs.append(sys.stdout.getvalue().splitlines())
+                finally:
+                    sys.stdout = sys.__stdout__
+        self.assertEqual(outputs[0], [f'{john_id} points: Python=10; DSA=0; Databases=0; Flask=0',
+                                      'No student is found for id=x.'])
+        self.assertEqual(outputs[1][0], 'Most popular: Python')
+        self.assertEqual(outputs[2][0], 'Python')
+        self.assertEqual(len(outputs[2]), 3)
+
+    def test_lazy_imports(self):
+        """Test that importing the tracker does not load the optional subsystems."""
+        import os
+        import subprocess
+        import sys
+        code = ('import sys, learning_progress_tracker; '
+                'print(sorted(set(sys.modules) & {"asyncio", "smtplib", "multiprocessing", "argparse"}))')
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(learning_progress_tracker.__file__)))
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    def test_search_students(self):
+        """Test the email index and the first and last name prefix index."""
+        for first_name, last_name, email in (('John', 'Doe', 'john@example.com'), ('Jane', 'Dow', 'jane@example.com'),
+                                             ('Dora', 'Smith', 'dora@example.com'), ('Don', 'Don', 'don@example.com')):
+            self.manager.add_student(first_name, last_name, email)
+        john, jane, dora, don = self.manager.students
+        self.assertIs(self.manager.find_student_by_email('jane@example.com'), jane)
+        self.assertIsNone(self.manager.find_student_by_email('JANE@example.com'))
+        # Ordered by the matching name, and Don Don is only listed once
+        self.assertEqual(self.manager.find_students_by_name('DO'), [john, don, dora, jane])
+        self.assertEqual(self.manager.find_students_by_name('do', limit=2), [john, don])
+        self.assertEqual(self.manager.find_students_by_name('j'), [jane, john])
+        self.assertEqual(self.manager.add_student('Jo', 'Doe', 'john@example.com'), 'This email is already taken.')
+
+        self.manager.remove_student(john.student_id)
+        self.assertIsNone(self.manager.find_student_by_email('john@example.com'))
+        self.assertEqual(self.manager.find_students_by_name('do'), [don, dora, jane])
+        self.assertEqual(self.manager.student_query('email dora@example.com'),
+                         [f'{dora.student_id} points: Python=0; DSA=0; Databases=0; Flask=0'])
+        self.assertEqual(self.manager.student_query('email john@example.com'),
+                         ['No student is found for email=john@example.com.'])
+        self.assertEqual(self.manager.student_query('name xyz'), ['No student is found for name=xyz.'])
+        self.assertEqual(len(self.manager.student_query('name Do')), 3)
+
+    def test_thread_safe_stress(self):
+        """Test that concurrent registrations, points, removals and statistics keep every invariant."""
+        import random
+        import sys
+        import tempfile
+        import threading
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Switch threads as often as possible
+        self.addCleanup(sys.setswitchinterval, switch_interval)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        manager = StudentManager(thread_safe=True, lock_stripes=8)
+        store = TrackerStore(directory.name, snapshot_interval=300)
+        store.load(manager)
+        course_manager = CourseManager(manager)
+        emails = [f'student{i}@example.com' for i in range(60)]
+        writers = 4
+        added = [0] * writers
+        expected_points = [[0] * 4 for _ in range(writers)]
+        expected_submissions = [[0] * 4 for _ in range(writers)]
+        errors = []
+        barrier = threading.Barrier(writers + 1)
+        finished = threading.Event()
+
+        def write(number):
+            rng = random.Random(number)
+            try:
+                barrier.wait()
+                added[number] = sum(manager.add_student('John', 'Doe', email) == 'Success' for email in emails)
+                students = [manager.find_student_by_email(email) for email in emails]
+                for round_number in range(20):
+                    lines = [f'{rng.choice(students).student_id} ' + ' '.join(str(rng.choice((0, 1, 5, 40)))
+                                                                             for _ in range(4)) for _ in range(20)]
+                    if round_number % 2:
+                        manager.import_points(lines)
+                    else:
+                        for line in lines:
+                            manager.add_points_from_input(line)
+                    for line in lines:
+                        for index, point in enumerate(map(int, line.split()[1:])):
+                            expected_points[number][index] += point
+                            expected_submissions[number][index] += point > 0
+                    email = f'temporary{number}-{round_number}@example.com'
+                    manager.add_student('Jane', 'Roe', email)
+                    manager.find_student_by_email(email).update_points((10, 10, 10, 10))
+                    manager.remove_student(manager.find_student_by_email(email).student_id)
+            except Exception as error:
+                errors.append(error)
+
+        def read():
+            last_version = -1
+            try:
+                barrier.wait()
+                while not finished.is_set():
+                    version, totals = manager.statistics_snapshot()
+                    self.assertGreaterEqual(version, last_version)
+                    last_version = version
+                    for course in ('Python', 'DSA', 'Databases', 'Flask'):
+                        self.assertGreaterEqual(totals.points[course], totals.submissions[course])
+                        self.assertGreaterEqual(totals.submissions[course], totals.enrolled[course])
+                    course_manager.statistics_summary()
+                    snapshot = manager.snapshot()
+                    for course in ('Python', 'DSA', 'Databases', 'Flask'):
+                        ranking = snapshot.course_ranking(course)
+                        self.assertEqual(snapshot.course_totals.points[course], -sum(entry[0] for entry in ranking))
+                        self.assertEqual(snapshot.course_totals.enrolled[course], len(ranking))
+                        self.assertEqual(sum(snapshot.course_distribution(course).histogram), len(ranking))
+                    list(course_manager.course_detail_records('Python', 5))
+                    manager.course_distribution('DSA')
+                    manager.find_students_by_name('j', 5)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=write, args=(number,)) for number in range(writers)]
+        reader = threading.Thread(target=read)
+        for thread in threads + [reader]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        finished.set()
+        reader.join()
+        self.assertEqual(errors, [])
+
+        self.assertEqual(sum(added), len(emails))
+        self.assertEqual(sorted(student.email for student in manager.students), sorted(emails))
+        self.assertEqual(len(manager.name_index), 2 * len(emails))
+        for index, course in enumerate(('Python', 'DSA', 'Databases', 'Flask')):
+            points = [student.progress[course] for student in manager.students]
+            self.assertEqual(sum(points), sum(expected[index] for expected in expected_points))
+            self.assertEqual(manager.course_totals.points[course], sum(points))
+            self.assertEqual(manager.course_totals.submissions[course],
+                             sum(expected[index] for expected in expected_submissions))
+            self.assertEqual(manager.course_totals.enrolled[course], sum(point > 0 for point in points))
+            self.assertEqual(list(manager.leaderboards[course]),
+                             sorted((-student.progress[course], student.student_id)
+                                    for student in manager.students if student.progress[course] > 0))
+            self.assertEqual(sum(manager.course_distribution(course).histogram), sum(point > 0 for point in points))
+
+        store.close()
+        restored = StudentManager()
+        TrackerStore(directory.name).load(restored)
+        self.assertEqual({student.student_id: dict(student.progress) for student in restored.students},
+                         {student.student_id: dict(student.progress) for student in manager.students})
+        restored.store.close()
+
+    def test_single_threaded_writes_match_locked(self):
+        """Test that the writes of a single-threaded manager match those of a thread-safe one."""
+        import random
+        rng = random.Random(7)
+        managers = [StudentManager(), StudentManager(thread_safe=True)]
+        for manager in managers:
+            manager.history = SubmissionHistory()
+        emails = [f'student{i}@example.com' for i in range(20)]
+        for email in emails + emails[:3] + ['invalid']:
+            results = [manager.add_student('John', 'Doe', email) for manager in managers]
+            self.assertEqual(results[0], results[1])
+        for _ in range(300):
+            email = rng.choice(emails)
+            points = tuple(rng.choice((0, 0, 1, 30, 200)) for _ in range(4))
+            for manager in managers:
+                manager.update_points(manager.find_student_by_email(email), points)
+        states = [([(student.student_id, dict(student.progress), dict(student.submissions),
+                     dict(student.completed_courses)) for student in manager.students],
+                   manager.version, manager.course_totals.points, manager.course_totals.submissions,
+                   manager.course_totals.enrolled,
+                   {course: list(leaderboard) for course, leaderboard in manager.leaderboards.items()},
+                   [distribution.histogram for distribution in manager.distributions],
+                   [(student.student_id, course) for student, course in manager.pending_notifications],
+                   list(manager.name_index), manager.history.window(10 ** 6).table)
+                  for manager in managers]
+        self.assertEqual(states[0], states[1])
+
+    def test_update_removed_student(self):
+        """Test that points of a removed student do not reach the student reusing its row."""
+        for thread_safe in (False, True):
+            manager = StudentManager(thread_safe=thread_safe)
+            manager.add_student('John', 'Doe', 'john.doe@example.com')
+            removed = manager.students[0]
+            manager.remove_student(removed.student_id)
+            manager.add_student('Jane', 'Roe', 'jane.roe@example.com')
+            jane = manager.students[0]
+            self.assertEqual(jane.row, removed.row)
+            version = manager.version
+            manager.update_points(removed, (10, 0, 0, 0))
+            self.assertEqual(jane.progress['Python'], 0)
+            self.assertEqual(manager.course_totals.points['Python'], 0)
+            self.assertEqual(list(manager.leaderboards['Python']), [])
+            self.assertEqual(manager.version, version)
+
+    def test_completion_counts(self):
+        """Test that the completion counts follow updates, batches, removals and restores."""
+        import tempfile
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        manager = StudentManager()
+        store = TrackerStore(directory.name)
+        store.load(manager)
+        course_manager = CourseManager(manager)
+        for i in range(4):
+            manager.add_student('John', 'Doe', f'student{i}@example.com')
+        first, second, third, fourth = manager.students
+        first.update_points((600, 0, 0, 0))
+        first.update_points((1, 0, 0, 0))
+        report = course_manager.snapshot()
+        manager.apply_points_batch([f'{second.student_id} 300 400 0 0', f'{second.student_id} 300 0 0 0',
+                                    f'{third.student_id} 599 0 0 0'])
+        self.assertEqual(report.completion_counts(), {'Python': 1, 'DSA': 0, 'Databases': 0, 'Flask': 0})
+        self.assertEqual(manager.completed_counts(), {'Python': 2, 'DSA': 1, 'Databases': 0, 'Flask': 0})
+        course_manager.determine_course_completion('Python')
+        manager.mark_notified(fourth, 'Flask')
+        self.assertEqual(course_manager.snapshot().completion_counts(),
+                         {'Python': 2, 'DSA': 1, 'Databases': 0, 'Flask': 1})
+        manager.remove_student(second.student_id)
+        expected = {'Python': 1, 'DSA': 0, 'Databases': 0, 'Flask': 1}
+        self.assertEqual(manager.completed_counts(), expected)
+        self.assertEqual(course_manager.snapshot().completion_counts(), expected)
+        store.close()
+        restored = StudentManager()
+        TrackerStore(directory.name).load(restored)
+        self.assertEqual(restored.completed_counts(), expected)
+        restored.store.close()
+
     def test_find_student(self):
         """Test finding and displaying student information."""
         self.manager.add_student('John', 'Doe', 'john.doe@example.com')
@@ -297,6 +842,33 @@ class TestCourseManager(unittest.TestCase):
         self.assertIn(expected_dsa_notification, output)
         self.assertIn("Total 1 student have been notified.", output)  # Singular 'student' since only John is notified
 
+    def test_completion_events(self):
+        """Test that completions are queued when points cross the course threshold."""
+        self.john.update_points((599, 0, 0, 0))
+        self.assertFalse(self.john.completed_courses['Python'])
+        self.assertEqual(len(self.student_manager.pending_notifications), 0)
+        self.john.update_points((1, 0, 0, 0))
+        self.john.update_points((5, 0, 0, 0))  # Already completed, queued only once
+        self.jane.update_points((0, 400, 0, 0))
+        self.assertTrue(self.john.completed_courses['Python'])
+        self.assertEqual(list(self.student_manager.pending_notifications),
+                         [(self.john, 'Python'), (self.jane, 'DSA')])
+
+        # Removed students are not notified
+        self.student_manager.remove_student(self.jane.student_id)
+        from io import StringIO
+        import sys
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        try:
+            self.course_manager.notify_students()
+        finally:
+            sys.stdout = sys.__stdout__
+        output = captured_output.getvalue()
+        self.assertNotIn(self.jane.email, output)
+        self.assertIn("Total 1 student have been notified.", output)
+        self.assertEqual(len(self.student_manager.pending_notifications), 0)
+
     def test_get_completion_percentage(self):
         """Test calculation of completion percentage."""
         percentage_python = self.course_manager.get_completion_percentage('Python', 300)
@@ -360,7 +932,887 @@ class TestCourseManager(unittest.TestCase):
         self.assertIn('100.0%', output)  # John's completion percentage
         self.assertIn('50.0%', output)   # Jane's completion percentage
 
-    # Add other existing tests from previous code as needed
+    def test_display_course_details_page(self):
+        """Test that course details can be limited to one page of the ranking."""
+        self.student_manager.add_student('Alice', 'Smith', 'alice.smith@example.com')
+        alice = self.student_manager.students[2]
+        self.john.update_points((100, 0, 0, 0))
+        self.jane.update_points((300, 0, 0, 0))
+        alice.update_points((200, 0, 0, 0))
+        self.john.update_points((250, 0, 0, 0))  # John moves to the top
+
+        from io import StringIO
+        import sys
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        try:
+            self.course_manager.display_course_details('Python', 2, 1)
+        finally:
+            sys.stdout = sys.__stdout__
+        rows = captured_output.getvalue().splitlines()[2:]
+        self.assertEqual([row.split()[0] for row in rows], [str(self.jane.student_id), str(alice.student_id)])
+        self.assertEqual(list(self.student_manager.leaderboards['Python']),
+                         [(-350, self.john.student_id), (-300, self.jane.student_id), (-200, alice.student_id)])
+
+        self.student_manager.remove_student(self.jane.student_id)
+        self.assertEqual(list(self.student_manager.leaderboards['Python']),
+                         [(-350, self.john.student_id), (-200, alice.student_id)])
+
+    def test_course_totals(self):
+        """Test that running course totals follow point updates and student removal."""
+        self.john.update_points((10, 0, 0, 5))
+        self.john.update_points((20, 0, 0, 0))
+        self.jane.update_points((30, 0, 40, 0))
+        totals = self.student_manager.course_totals
+        self.assertEqual(totals.enrolled, {'Python': 2, 'DSA': 0, 'Databases': 1, 'Flask': 1})
+        self.assertEqual(totals.submissions, {'Python': 3, 'DSA': 0, 'Databases': 1, 'Flask': 1})
+        self.assertEqual(totals.points, {'Python': 60, 'DSA': 0, 'Databases': 40, 'Flask': 5})
+
+        self.student_manager.remove_student(self.jane.student_id)
+        self.assertEqual(totals.enrolled, {'Python': 1, 'DSA': 0, 'Databases': 0, 'Flask': 1})
+        self.assertEqual(totals.submissions, {'Python': 2, 'DSA': 0, 'Databases': 0, 'Flask': 1})
+        self.assertEqual(totals.points, {'Python': 30, 'DSA': 0, 'Databases': 0, 'Flask': 5})
+
+    def test_course_rankings(self):
+        """Test the most/least popular, activity and difficulty rankings."""
+        self.assertEqual(self.course_manager.most_popular_course(), ['n/a'])
+        self.assertEqual(self.course_manager.least_popular_course(), ['n/a'])
+        self.assertEqual(self.course_manager.hardest_course(), ['n/a'])
+
+        self.john.update_points((10, 20, 0, 0))
+        self.john.update_points((10, 0, 0, 0))
+        self.jane.update_points((5, 0, 0, 0))
+        self.assertEqual(self.course_manager.most_popular_course(), ['Python'])
+        self.assertEqual(self.course_manager.least_popular_course(), ['DSA'])
+        self.assertEqual(self.course_manager.highest_activity_course(), ['Python'])
+        self.assertEqual(self.course_manager.lowest_activity_course(), ['DSA'])
+        self.assertEqual(self.course_manager.easiest_course(), ['DSA'])
+        self.assertEqual(self.course_manager.hardest_course(), ['Python'])
+
+    def test_snapshot_report(self):
+        """Test that statistics and course details of a snapshot ignore later writes."""
+        self.john.update_points((10, 0, 0, 0))
+        self.jane.update_points((20, 0, 0, 0))
+        report = self.course_manager.snapshot()
+        self.john.update_points((30, 5, 0, 0))
+        self.student_manager.remove_student(self.jane.student_id)
+        self.assertEqual(report.most_popular_course(), ['Python'])
+        self.assertEqual(self.course_manager.most_popular_course(), ['Python', 'DSA'])
+        records = list(report.course_detail_records('Python'))[1:]
+        self.assertEqual([(record['id'], record['points']) for record in records],
+                         [(self.jane.student_id, 20), (self.john.student_id, 10)])
+        self.assertEqual(report.student_manager.course_distribution('Python').sketch.count, 2)
+
+        # Writes made while the statistics command waits for input are not shown
+        inputs = ['Python', 'back']
+
+        def write_then_input():
+            if self.student_manager.add_student('Alice', 'Brown', 'alice.brown@example.com') == 'Success':
+                self.student_manager.students[-1].update_points((100, 0, 0, 0))
+            return inputs.pop(0)
+
+        output = io.StringIO()
+        original_input = builtins.input
+        builtins.input = write_then_input
+        try:
+            with contextlib.redirect_stdout(output):
+                self.course_manager.course_statistics()
+        finally:
+            builtins.input = original_input
+        alice = self.student_manager.find_student_by_email('alice.brown@example.com')
+        self.assertEqual(alice.progress['Python'], 100)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[1], 'Most popular: Python, DSA')
+        self.assertEqual(lines[-1].split(), [str(self.john.student_id), '40', '6.7%'])
+
+    def test_notification_run_is_point_in_time(self):
+        """Test that completions queued during a notification run are left for the next run."""
+        self.john.update_points((600, 0, 0, 0))
+        records = self.course_manager.notification_records()
+        self.assertEqual(next(records)['id'], self.john.student_id)
+        self.jane.update_points((0, 400, 0, 0))
+        self.assertEqual(list(records), [])
+        self.assertEqual([(record['id'], record['course']) for record in self.course_manager.notification_records()],
+                         [(self.jane.student_id, 'DSA')])
+
+    def test_statistics_cache(self):
+        """Test that statistics are reused until a write and recomputed after it."""
+        self.john.update_points((10, 0, 0, 0))
+        most_popular = self.course_manager.most_popular_course()
+        self.course_manager.popularity.clear()  # Not read again while the manager is unchanged
+        self.assertIs(self.course_manager.most_popular_course(), most_popular)
+        self.assertEqual(self.course_manager.popularity, {})
+
+        self.jane.update_points((0, 5, 0, 0))
+        self.jane.update_points((0, 5, 0, 0))
+        self.assertEqual(self.course_manager.highest_activity_course(), ['DSA'])
+        self.student_manager.add_student('Alice', 'Brown', 'alice.brown@example.com')
+        self.student_manager.students[-1].update_points((0, 0, 7, 0))
+        self.assertEqual(sorted(self.course_manager.most_popular_course()), ['DSA', 'Databases', 'Python'])
+        self.assertEqual(self.course_manager.popularity['Databases'], 1)
+        self.student_manager.remove_student(self.jane.student_id)
+        self.assertEqual(self.course_manager.lowest_activity_course(), ['n/a'])
+
+    def test_snapshot_shares_cache(self):
+        """Test that snapshots are reused until a write and share the statistics cache."""
+        self.john.update_points((10, 0, 0, 0))
+        most_popular = self.course_manager.most_popular_course()
+        report = self.course_manager.snapshot()
+        self.assertIs(self.course_manager.snapshot(), report)
+        self.assertIs(report.most_popular_course(), most_popular)
+        summary = report.statistics_summary()
+        self.assertIs(self.course_manager.hardest_course(), summary['hardest_course'])
+
+        self.jane.update_points((0, 5, 0, 0))
+        later_report = self.course_manager.snapshot()
+        self.assertIsNot(later_report, report)
+        self.assertEqual(sorted(later_report.most_popular_course()), ['DSA', 'Python'])
+        self.assertEqual(report.most_popular_course(), ['Python'])
+
+    def test_statistics_after_live_statistics(self):
+        """Test that the statistics command reports every ranking after the live manager computed them."""
+        self.john.update_points((10, 5, 0, 0))
+        self.jane.update_points((20, 0, 0, 0))
+        self.assertEqual(self.course_manager.most_popular_course(), ['Python'])
+        self.assertEqual(self.course_manager.highest_activity_course(), ['Python'])
+        self.assertEqual(self.course_manager.easiest_course(), ['Python'])
+        self.assertEqual(self.course_manager.snapshot().least_popular_course(), ['DSA'])
+
+        output = io.StringIO()
+        inputs = ['back']
+        original_input = builtins.input
+        builtins.input = lambda: inputs.pop(0)
+        try:
+            with contextlib.redirect_stdout(output):
+                self.course_manager.course_statistics()
+        finally:
+            builtins.input = original_input
+        self.assertEqual(output.getvalue().splitlines()[1:], [
+            'Most popular: Python', 'Least popular: DSA', 'Highest activity: Python', 'Lowest activity: DSA',
+            'Easiest course: Python', 'Hardest course: DSA'])
+
+    def test_course_distribution(self):
+        """Test that the percentiles and histogram follow updates, batches and removals."""
+        self.john.update_points((300, 0, 0, 0))
+        self.john.update_points((300, 0, 0, 0))
+        self.jane.update_points((59, 0, 0, 0))
+        self.student_manager.apply_points_batch([f"{self.jane.student_id} 1 0 0 0", f"{self.jane.student_id} 60 0 0 0"])
+        distribution = self.student_manager.course_distribution('Python')
+        self.assertEqual(list(distribution.histogram), [0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1])
+        self.assertEqual(distribution.sketch.count, 2)
+        self.assertAlmostEqual(distribution.sketch.quantile(0.5), 120, delta=1.2)
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.course_manager.display_course_query('distribution python')
+            self.course_manager.display_course_query('distribution Chemistry')
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[:4], ['Python distribution', 'Median: 120', 'P90: 120', 'P99: 120'])
+        self.assertEqual(lines[4], '0-9%: 0')
+        self.assertEqual(lines[6], '20-29%: 1')
+        self.assertEqual(lines[14:], ['100%: 1', 'Unknown course'])
+
+        self.student_manager.remove_student(self.john.student_id)
+        distribution = self.student_manager.course_distribution('Python')
+        self.assertEqual(distribution.histogram[10], 0)
+        self.assertAlmostEqual(distribution.sketch.quantile(0.99), 120, delta=1.2)
+        self.assertIsNone(self.student_manager.course_distribution('DSA').sketch.quantile(0.5))
+
+
+class TestPointsSketch(unittest.TestCase):
+    """Tests for the PointsSketch class."""
+
+    def test_relative_accuracy(self):
+        """Test that quantiles stay within the relative accuracy after removals and merges."""
+        import random
+        rng = random.Random(3)
+        values = [rng.randint(1, 100_000) for _ in range(5000)]
+        sketch, other = PointsSketch(), PointsSketch()
+        for value in values[:4000]:
+            sketch.add(value)
+        for value in values[4000:]:
+            other.add(value)
+        sketch.merge(other)
+        for value in values[:1000]:
+            sketch.remove(value)
+        remaining = sorted(values[1000:])
+        for q in (0.0, 0.5, 0.9, 0.99, 1.0):
+            exact = remaining[int(q * (len(remaining) - 1))]
+            self.assertLessEqual(abs(sketch.quantile(q) - exact), 0.01 * exact)
+        self.assertLess(len(sketch.counts), 600)
+        self.assertIsNone(PointsSketch().quantile(0.5))
+
+
+class TestCourseCatalog(unittest.TestCase):
+    """Tests for the CourseCatalog class and configurable courses."""
+
+    def setUp(self):
+        """Switch to a catalog of five courses and restore the default one afterwards."""
+        self.catalog = CourseCatalog.from_config([
+            {'name': 'Python', 'points': 600, 'aliases': ['py']}, {'name': 'DSA', 'points': 400},
+            {'name': 'Databases', 'points': 480}, {'name': 'Flask', 'points': 550},
+            {'name': 'Machine Learning', 'points': 100}])
+        learning_progress_tracker.use_catalog(self.catalog)
+        self.addCleanup(learning_progress_tracker.use_catalog, learning_progress_tracker.DEFAULT_CATALOG)
+
+    def test_lookup(self):
+        """Test that names and case-insensitive aliases map to dense indexes."""
+        self.assertEqual(self.catalog.lookup('Python'), 0)
+        self.assertEqual(self.catalog.lookup('PY'), 0)
+        self.assertEqual(self.catalog.find('machine learning'), 'Machine Learning')
+        self.assertIsNone(self.catalog.lookup('Rust'))
+        self.assertEqual(self.catalog.thresholds, (600, 400, 480, 550, 100))
+        self.assertEqual(list(CourseCatalog.from_config({'Go': 10, 'Rust': 20})), ['Go', 'Rust'])
+        with self.assertRaises(ValueError):
+            CourseCatalog([('Go', 10), ('Go', 20)])
+
+    def test_wider_points(self):
+        """Test that points lines, rankings and completion follow the catalog width."""
+        manager = StudentManager()
+        course_manager = CourseManager(manager)
+        manager.add_student('John', 'Doe', 'john.doe@example.com')
+        john = manager.students[0]
+        self.assertEqual(manager.add_points_from_input(f'{john.student_id} 1 2 3 4'), 'Incorrect points format')
+        self.assertEqual(manager.add_points_from_input(f'{john.student_id} 1 0 0 0 100'), 'Points updated.')
+        self.assertEqual(manager.student_summary(str(john.student_id)),
+                         f'{john.student_id} points: Python=1; DSA=0; Databases=0; Flask=0; Machine Learning=100')
+        self.assertTrue(john.completed_courses['Machine Learning'])
+        self.assertEqual(course_manager.most_popular_course(), ['Python', 'Machine Learning'])
+        self.assertEqual(course_manager.easiest_course(), ['Machine Learning'])
+        self.assertEqual(manager.course_totals.points['Machine Learning'], 100)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            course_manager.display_course_query('machine learning 1')
+            course_manager.display_course_query('machine 1')
+        self.assertEqual(output.getvalue().splitlines(),
+                         ['Machine Learning', 'id                       points       completed   ',
+                          f'{john.student_id:<24} 100          100.0%', 'Unknown course'])
+
+    def test_course_names_ending_in_numbers(self):
+        """Test that a course named with a trailing number is found before the number is read as a limit."""
+        learning_progress_tracker.use_catalog(CourseCatalog([('Python', 600), ('Python 3', 300)]))
+        manager = StudentManager()
+        course_manager = CourseManager(manager)
+        for email in ('john@example.com', 'jane@example.com'):
+            manager.add_student('John', 'Doe', email)
+        john, jane = manager.students
+        john.update_points((10, 300))
+        jane.update_points((20, 100))
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            course_manager.display_course_query('python 3')
+            course_manager.display_course_query('python 3 1 1')
+            course_manager.display_course_query('python 1')
+            course_manager.display_course_query('python 4 1 1')
+        self.assertEqual([line.split()[0] for line in output.getvalue().splitlines() if line[0].isdigit()],
+                         [str(john.student_id), str(jane.student_id), str(jane.student_id), str(jane.student_id)])
+        self.assertEqual(output.getvalue().splitlines()[-1], 'Unknown course')
+
+
+class TestSubmissionHistory(unittest.TestCase):
+    """Tests for the SubmissionHistory class and the windowed statistics."""
+
+    def setUp(self):
+        """Create a manager whose history uses a controllable clock with one-hour buckets."""
+        self.now = 0.0
+        self.student_manager = StudentManager()
+        self.student_manager.history = SubmissionHistory(retention=24 * 3600, clock=lambda: self.now)
+        self.course_manager = CourseManager(self.student_manager)
+        self.student_manager.add_student('John', 'Doe', 'john.doe@example.com')
+        self.student_manager.add_student('Jane', 'Smith', 'jane.smith@example.com')
+        self.john, self.jane = self.student_manager.students
+
+    def test_windowed_statistics(self):
+        """Test that the windows only count the submissions of their buckets."""
+        self.john.update_points((10, 0, 0, 0))
+        self.now = 5 * 3600
+        self.john.update_points((20, 4, 0, 0))
+        self.jane.update_points((30, 0, 0, 0))
+        self.assertEqual(self.course_manager.windowed_popularity(3600),
+                         {'Python': 2, 'DSA': 1, 'Databases': 'n/a', 'Flask': 'n/a'})
+        self.assertEqual(self.course_manager.windowed_activity(6 * 3600)['Python'], 3)
+        self.assertEqual(self.course_manager.windowed_difficulty(3600)['Python'], 25)
+        with self.assertRaises(ValueError):
+            CourseManager(StudentManager()).windowed_activity(3600)
+
+    def test_retention(self):
+        """Test that buckets older than the retention are dropped and late submissions are kept in order."""
+        history = self.student_manager.history
+        for hour in range(48):
+            history.record(1, (1, 0, 0, 0), hour * 3600)
+        self.assertEqual(len(history.buckets), 24)
+        self.assertEqual(history.window(7 * 86400, now=47 * 3600).submissions['Python'], 24)
+        history.record(2, (0, 5, 0, 0), 10 * 3600)  # Older than the retention
+        history.record(2, (0, 5, 0, 0), 30.5 * 3600)
+        self.assertEqual(history.window(7 * 86400, now=47 * 3600).submissions['DSA'], 1)
+        self.assertEqual([bucket.index for bucket in history.buckets], list(range(24, 48)))
+
+    def test_distinct_students(self):
+        """Test that windows ending now count each student once, with late submissions and dropped buckets."""
+        import random
+        rng = random.Random(3)
+        history = self.student_manager.history
+        submissions = []
+        for step in range(2000):
+            hour = step // 40
+            # Mostly current submissions, some arriving a few hours late
+            timestamp = (hour - rng.choice([0, 0, 0, 1, 5])) * 3600 + 1
+            student_id, course = rng.randint(1, 60), rng.randrange(4)
+            points = tuple(5 if index == course else 0 for index in range(4))
+            history.record(student_id, points, timestamp)
+            submissions.append((timestamp, student_id, course))
+            if step % 97 == 0:
+                now = hour * 3600 + 1
+                for seconds in (3600, 6 * 3600, 30 * 3600):
+                    # Buckets before the window or older than the 24 hour retention are not counted
+                    first = max((now - seconds) // 3600, hour - 23)
+                    window = history.window(seconds, now)
+                    for index, course in enumerate(('Python', 'DSA', 'Databases', 'Flask')):
+                        expected = {submitted for time, submitted, submitted_course in submissions
+                                    if submitted_course == index and time // 3600 >= first}
+                        self.assertEqual(window.enrolled[course], len(expected))
+        # Every active student is kept once per course
+        for index, latest in enumerate(history.latest):
+            self.assertEqual(sum(len(bucket.students[index]) for bucket in history.buckets), len(latest))
+
+
+class TestOutputSink(unittest.TestCase):
+    """Tests for the output sinks."""
+
+    def setUp(self):
+        """Set up a student who completed two courses."""
+        self.student_manager = StudentManager()
+        self.course_manager = CourseManager(self.student_manager)
+        self.student_manager.add_student('John', 'Doe', 'john.doe@example.com')
+        self.john = self.student_manager.students[0]
+        self.john.update_points((600, 400, 0, 0))
+
+    def test_text_sink_matches_print(self):
+        """Test that batched notifications produce exactly the text of one print per line."""
+        from io import StringIO
+        stream = StringIO()
+        self.student_manager.sink = TextSink(stream, buffer_records=1)
+        self.course_manager.notify_students()
+        expected = ''.join(f'To: john.doe@example.com\nRe: Your Learning Progress\n'
+                           f'Hello, John Doe! You have accomplished our {course} course!\n'
+                           for course in ('Python', 'DSA'))
+        self.assertEqual(stream.getvalue(), expected + 'Total 1 student have been notified.\n')
+
+    def test_jsonl_sink(self):
+        """Test that the JSONL sink writes one object per record."""
+        import json
+        from io import StringIO
+        stream = StringIO()
+        self.student_manager.sink = JsonlSink(stream)
+        self.course_manager.display_course_details('Python')
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(records, [
+            {'type': 'course_header', 'course': 'Python'},
+            {'type': 'course_row', 'course': 'Python', 'id': self.john.student_id, 'points': 600,
+             'completed': 100.0},
+        ])
+
+
+class FakeTransport:
+    """In-memory transport that fails the first attempts for some addresses."""
+
+    def __init__(self, delivered, failures, connect_error=None):
+        self.delivered = delivered
+        self.failures = failures
+        self.connect_error = connect_error
+        self.connects = 0
+
+    async def connect(self):
+        self.connects += 1
+        if self.connect_error is not None:
+            raise self.connect_error
+
+    async def send(self, record):
+        failure = self.failures.get(record['email'], 0)
+        if isinstance(failure, Exception):
+            raise failure
+        if failure > 0:
+            self.failures[record['email']] -= 1
+            raise ConnectionError('connection reset')
+        self.delivered.append(record['email'])
+
+    async def close(self):
+        pass
+
+
+class TestNotificationDispatcher(unittest.TestCase):
+    """Tests for the NotificationDispatcher class."""
+
+    def setUp(self):
+        """Set up three students who completed a course."""
+        self.student_manager = StudentManager()
+        self.course_manager = CourseManager(self.student_manager)
+        for name in ('john', 'jane', 'alice'):
+            self.student_manager.add_student('John', 'Doe', f'{name}@example.com')
+            self.student_manager.students[-1].update_points((600, 0, 0, 0))
+        self.delivered = []
+
+    def notify(self, failures, retries):
+        """Notify through a fake transport and return the output."""
+        from io import StringIO
+        self.course_manager.dispatcher = NotificationDispatcher(
+            lambda: FakeTransport(self.delivered, failures), concurrency=2, retries=retries, retry_delay=0)
+        stream = StringIO()
+        self.student_manager.sink = TextSink(stream)
+        self.course_manager.notify_students()
+        return stream.getvalue()
+
+    def test_retries(self):
+        """Test that transient failures are retried and the output keeps the queue order."""
+        output = self.notify({'jane@example.com': 2}, retries=2)
+        self.assertEqual(sorted(self.delivered), ['alice@example.com', 'jane@example.com', 'john@example.com'])
+        self.assertEqual([line for line in output.splitlines() if line.startswith('To:')],
+                         ['To: john@example.com', 'To: jane@example.com', 'To: alice@example.com'])
+        self.assertIn('Total 3 students have been notified.', output)
+
+    def test_failed_delivery_is_not_marked(self):
+        """Test that only confirmed sends are marked and failures stay queued."""
+        output = self.notify({'jane@example.com': 5}, retries=1)
+        jane = self.student_manager.students[1]
+        self.assertFalse(jane.notifications_sent['Python'])
+        self.assertTrue(self.student_manager.students[0].notifications_sent['Python'])
+        self.assertIn('Failed to deliver 1 notifications.', output)
+        self.assertIn('Total 2 students have been notified.', output)
+        self.assertEqual(list(self.student_manager.pending_notifications), [(jane, 'Python')])
+
+        output = self.notify({}, retries=0)
+        self.assertTrue(jane.notifications_sent['Python'])
+        self.assertIn('Total 1 student have been notified.', output)
+
+    def test_unreachable_server_fails_fast(self):
+        """Test that a connection that cannot be opened fails the batch without retrying every record."""
+        import smtplib
+        transports = []
+
+        def transport_factory():
+            transports.append(FakeTransport(self.delivered, {}, smtplib.SMTPConnectError(421, 'unavailable')))
+            return transports[-1]
+
+        self.course_manager.dispatcher = NotificationDispatcher(transport_factory, concurrency=1, retries=2,
+                                                                retry_delay=0)
+        self.student_manager.sink = TextSink(io.StringIO())
+        self.course_manager.notify_students()
+        self.assertEqual([transport.connects for transport in transports], [3])
+        self.assertEqual(len(self.student_manager.pending_notifications), 3)
+        self.assertFalse(any(student.notifications_sent['Python'] for student in self.student_manager.students))
+
+    def test_unexpected_errors_keep_records(self):
+        """Test that records survive errors other than connection failures, in the dispatcher or around it."""
+        output = self.notify({'jane@example.com': ValueError('bad address')}, retries=3)
+        self.assertIn('Failed to deliver 1 notifications.', output)
+        self.assertEqual(sorted(self.delivered), ['alice@example.com', 'john@example.com'])
+        jane = self.student_manager.students[1]
+        self.assertEqual(list(self.student_manager.pending_notifications), [(jane, 'Python')])
+
+        class BrokenDispatcher:
+            def send_all(self, records):
+                raise RuntimeError('event loop failure')
+
+        self.course_manager.dispatcher = BrokenDispatcher()
+        with self.assertRaises(RuntimeError):
+            self.course_manager.notify_students()
+        self.assertEqual(list(self.student_manager.pending_notifications), [(jane, 'Python')])
+        self.assertFalse(jane.notifications_sent['Python'])
+
+    def test_smtp_transport(self):
+        """Test delivery to a local SMTP server."""
+        import socketserver
+        import threading
+        received = []
+
+        class SmtpHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.wfile.write(b'220 localhost ready\r\n')
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line[:4].upper()
+                    if command == b'DATA':
+                        self.wfile.write(b'354 end with .\r\n')
+                        data = []
+                        for data_line in iter(self.rfile.readline, b'.\r\n'):
+                            data.append(data_line)
+                        received.append(b''.join(data).decode())
+                        self.wfile.write(b'250 queued\r\n')
+                    elif command == b'QUIT':
+                        self.wfile.write(b'221 bye\r\n')
+                        return
+                    else:
+                        self.wfile.write(b'250 ok\r\n')
+
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SmtpHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address
+        dispatcher = NotificationDispatcher(lambda: SmtpTransport(host, port, 'tracker@example.com'),
+                                            concurrency=2)
+        records = list(self.course_manager.notification_records(mark_sent=False))
+        sent, failed = dispatcher.send_all(records)
+        self.assertEqual((len(sent), failed), (3, []))
+        self.assertEqual(len(received), 3)
+        self.assertTrue(any('To: jane@example.com' in message for message in received))
+        self.assertIn('Hello, John Doe! You have accomplished our Python course!', received[0])
+
+
+class TestShardedStudentManager(unittest.TestCase):
+    """Tests for the ShardedStudentManager class."""
+
+    def test_matches_single_process(self):
+        """Test that sharded ingestion and merged statistics match a single StudentManager."""
+        import random
+        rng = random.Random(7)
+        student_lines = [f'John Doe student{i}@example.com' for i in range(40)] + ['John D bad@example.com',
+                                                                                 'John Doe student3@example.com']
+        single = StudentManager()
+        single_result = single.import_students(student_lines)
+        ids = [student.student_id for student in single.students]
+        point_lines = [f'{rng.choice(ids)} ' + ' '.join(str(rng.choice([0, 0, 50, 300])) for _ in range(4))
+                       for _ in range(200)] + ['12 1 2 3', 'abc 1 2 3 4']
+        single_points = single.import_points(point_lines)
+
+        with ShardedStudentManager(workers=3) as sharded:
+            self.assertEqual(sharded.import_students(student_lines), single_result)
+            self.assertEqual(sorted(sharded.student_ids()), sorted(ids))
+            self.assertEqual(sharded.import_points(point_lines), single_points)
+            self.assertEqual(sharded.find_progress(ids[0]), dict(single.students[0].progress))
+            self.assertIsNone(sharded.find_progress(12))
+
+            single_courses = CourseManager(single)
+            sharded_courses = CourseManager(sharded)
+            for method in ('most_popular_course', 'least_popular_course', 'highest_activity_course',
+                           'lowest_activity_course', 'easiest_course', 'hardest_course'):
+                self.assertEqual(getattr(sharded_courses, method)(), getattr(single_courses, method)())
+            for course in ('Python', 'Flask'):
+                self.assertEqual(sharded.leaderboards[course].slice(3, 10),
+                                 single.leaderboards[course].slice(3, 10))
+                self.assertEqual(sharded.leaderboards[course].slice(),
+                                 single.leaderboards[course].slice())
+            completed = {course: sum(s.completed_courses[course] for s in single.students)
+                         for course in ('Python', 'DSA', 'Databases', 'Flask')}
+            self.assertEqual(sharded.completed_counts(), completed)
+            for course in ('Python', 'Flask'):
+                merged, exact = sharded.course_distribution(course), single.course_distribution(course)
+                self.assertEqual(merged.histogram, exact.histogram)
+                self.assertEqual(merged.sketch.quantile(0.5), exact.sketch.quantile(0.5))
+            self.assertEqual(sharded_courses.statistics_summary(), single_courses.statistics_summary())
+            self.assertEqual(sharded_courses.completion_counts(), completed)
+            self.assertEqual(sorted((r['id'], r['course']) for r in sharded.notification_records(mark_sent=False)),
+                             sorted((s.student_id, c) for s, c in single.pending_notifications))
+
+    def test_course_manager(self):
+        """Test notifications and statistics of a CourseManager running over a sharded manager."""
+        student_lines = [f'John Doe student{i}@example.com' for i in range(12)]
+        single = StudentManager()
+        single.import_students(student_lines)
+        point_lines = [f'{student.student_id} 600 0 {index * 100} 0' for index, student in enumerate(single.students)]
+        single.import_points(point_lines)
+        with ShardedStudentManager(workers=3) as sharded:
+            sharded.import_students(student_lines)
+            sharded.import_points(point_lines)
+            outputs = []
+            for manager in (single, sharded):
+                manager.sink = TextSink(io.StringIO())
+                course_manager = CourseManager(manager)
+                course_manager.notify_students()
+                course_manager.notify_students()
+                self.assertEqual(course_manager.statistics_summary()['completed'],
+                                 {'Python': 12, 'DSA': 0, 'Databases': 7, 'Flask': 0})
+                outputs.append(manager.sink.stream.getvalue().splitlines())
+            for output in outputs:
+                self.assertEqual(output[-1], 'Total 0 students have been notified.')
+            self.assertEqual(sorted(outputs[1]), sorted(outputs[0]))
+            self.assertEqual(len([line for line in outputs[1] if line.startswith('To:')]), 19)
+
+    def test_rejects_counter_ids(self):
+        """Test that ids which do not follow from the email cannot be routed to shards."""
+        with self.assertRaises(ValueError):
+            ShardedStudentManager(workers=2, id_allocator=CounterIdAllocator())
+
+
+class TestTrackerService(unittest.TestCase):
+    """Tests for the TrackerService class."""
+
+    def setUp(self):
+        """Set up a service over an empty tracker."""
+        self.student_manager = StudentManager()
+        self.course_manager = CourseManager(self.student_manager)
+        self.service = TrackerService(self.student_manager, self.course_manager)
+
+    @staticmethod
+    async def request(port, method, path, body=''):
+        """Send one HTTP request and return the status and the decoded JSON payload."""
+        import asyncio
+        import json
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        content = body.encode()
+        writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+                     f'Content-Length: {len(content)}\r\n\r\n'.encode() + content)
+        response = await reader.read()
+        writer.close()
+        head, _, payload = response.partition(b'\r\n\r\n')
+        return int(head.split()[1]), json.loads(payload)
+
+    def run_session(self, session):
+        """Start the service on a free port and run a client session against it."""
+        import asyncio
+
+        async def run():
+            await self.service.start(port=0)
+            try:
+                return await session(self.service.port)
+            finally:
+                self.service.server.close()
+                await self.service.server.wait_closed()
+
+        return asyncio.run(run())
+
+    def test_endpoints(self):
+        """Test adding, finding, listing, statistics, course details and notifications."""
+        async def session(port):
+            self.service.WRITE_CHUNK = 2
+            status, added = await self.request(port, 'POST', '/students',
+                                               'John Doe john@example.com\nJane D jane@example.com\n'
+                                               'Jane Smith jane@example.com')
+            self.assertEqual((status, added), (200, {'applied': 2, 'errors': [[2, 'Incorrect last name.']]}))
+            john_id = self.student_manager.students[0].student_id
+            status, updated = await self.request(port, 'POST', '/points', f'{john_id} 600 0 0 5\n1 2 3')
+            self.assertEqual(updated, {'applied': 1, 'errors': [[2, 'Incorrect points format']]})
+            status, found = await self.request(port, 'GET', f'/students/{john_id}')
+            self.assertEqual(found, {'id': john_id, 'points': {'Python': 600, 'DSA': 0, 'Databases': 0,
+                                                               'Flask': 5}})
+            self.assertEqual((await self.request(port, 'GET', '/students/42'))[0], 404)
+            status, listed = await self.request(port, 'GET', '/students')
+            self.assertEqual(len(listed['ids']), 2)
+            status, found = await self.request(port, 'GET', '/students?name=do')
+            self.assertEqual([student['email'] for student in found['students']], ['john@example.com'])
+            status, found = await self.request(port, 'GET', '/students?email=nobody@example.com')
+            self.assertEqual(found, {'students': []})
+            status, statistics = await self.request(port, 'GET', '/statistics')
+            self.assertEqual(sorted(statistics['most_popular']), ['Flask', 'Python'])
+            status, details = await self.request(port, 'GET', '/courses/python?limit=5')
+            self.assertEqual(details['students'], [{'id': john_id, 'points': 600, 'completed': 100.0}])
+            status, notified = await self.request(port, 'POST', '/notify')
+            self.assertEqual(notified['students'], 1)
+            self.assertEqual(notified['notifications'][0]['course'], 'Python')
+            self.assertEqual((await self.request(port, 'DELETE', '/students'))[0], 405)
+            self.assertEqual((await self.request(port, 'GET', '/unknown'))[0], 404)
+            self.assertEqual((await self.request(port, 'GET', '/statistics?window=60'))[0], 404)
+            self.assertEqual((await self.request(port, 'GET', '/courses/python?limit=x'))[0], 400)
+
+        self.run_session(session)
+
+    def test_invalid_requests(self):
+        """Test that bad lengths and paging parameters are answered with 400 instead of dropping the client."""
+        import asyncio
+
+        async def session(port):
+            for length in ('abc', '-5'):
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(f'POST /students HTTP/1.1\r\nContent-Length: {length}\r\n\r\n'.encode())
+                response = await reader.read()
+                writer.close()
+                self.assertTrue(response.startswith(b'HTTP/1.1 400 Bad Request'))
+            for query in ('offset=-1', 'limit=-2', 'limit=5&offset=1.5'):
+                self.assertEqual((await self.request(port, 'GET', f'/courses/python?{query}'))[0], 400)
+            self.assertEqual(await self.request(port, 'GET', '/courses/python?limit=0&offset=3'),
+                             (200, {'course': 'Python', 'students': []}))
+            for query in ('limit=-1', 'limit=two'):
+                self.assertEqual((await self.request(port, 'GET', f'/students?name=j&{query}'))[0], 400)
+            self.assertEqual(await self.request(port, 'GET', '/students?name=j&limit=0'), (200, {'students': []}))
+
+        self.run_session(session)
+
+    def test_notify_failure(self):
+        """Test that a failing dispatcher is answered with 500 and leaves the notifications queued."""
+        class BrokenDispatcher:
+            async def dispatch(self, records):
+                raise OSError('mail server unavailable')
+
+        self.student_manager.add_student('John', 'Doe', 'john@example.com')
+        self.student_manager.students[0].update_points((600, 0, 0, 0))
+        self.course_manager.dispatcher = BrokenDispatcher()
+
+        async def session(port):
+            self.assertEqual(await self.request(port, 'POST', '/notify'),
+                             (500, {'error': 'Notification delivery failed: mail server unavailable'}))
+
+        self.run_session(session)
+        self.assertEqual(len(self.student_manager.pending_notifications), 1)
+        self.assertFalse(self.student_manager.students[0].notifications_sent['Python'])
+
+    def test_concurrent_writers(self):
+        """Test that concurrent batches are serialized without losing updates."""
+        import asyncio
+
+        async def session(port):
+            self.service.WRITE_CHUNK = 10
+            await self.request(port, 'POST', '/students', 'John Doe john@example.com')
+            john_id = self.student_manager.students[0].student_id
+            batch = '\n'.join(f'{john_id} 1 0 0 0' for _ in range(50))
+            results = await asyncio.gather(*(self.request(port, 'POST', '/points', batch) for _ in range(8)),
+                                           *(self.request(port, 'GET', '/statistics') for _ in range(8)))
+            self.assertTrue(all(status == 200 for status, _ in results))
+
+        self.run_session(session)
+        john = self.student_manager.students[0]
+        self.assertEqual(john.progress['Python'], 400)
+        self.assertEqual(john.submissions['Python'], 400)
+
+
+class TestTrackerStore(unittest.TestCase):
+    """Tests for the TrackerStore class."""
+
+    def setUp(self):
+        """Create a temporary data directory."""
+        import tempfile
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def open_manager(self, snapshot_interval=100):
+        """Load a manager from the data directory."""
+        manager = StudentManager()
+        store = TrackerStore(self.directory.name, snapshot_interval=snapshot_interval)
+        store.load(manager)
+        self.addCleanup(store.close)
+        return manager, store
+
+    def test_restore_from_journal(self):
+        """Test that students, points, notifications and removals survive a restart."""
+        manager, store = self.open_manager()
+        manager.add_student('John', 'Doe', 'john.doe@example.com')
+        manager.add_student('Jane', 'Smith', 'jane.smith@example.com')
+        john, jane = manager.students
+        john.update_points((600, 10, 0, 0))
+        manager.mark_notified(john, 'Python')
+        manager.remove_student(jane.student_id)
+        store.close()
+
+        restored, _ = self.open_manager()
+        self.assertEqual([s.student_id for s in restored.students], [john.student_id])
+        student = restored.students[0]
+        self.assertEqual(student.email, 'john.doe@example.com')
+        self.assertEqual(student.progress, {'Python': 600, 'DSA': 10, 'Databases': 0, 'Flask': 0})
+        self.assertTrue(student.notifications_sent['Python'])
+        self.assertEqual(restored.course_totals.points, manager.course_totals.points)
+        self.assertEqual(restored.add_student('Jane', 'Smith', 'jane.smith@example.com'), 'Success')
+
+    def test_notify_removed_student(self):
+        """Test that notifying a removed student is not journaled and that older journals naming one still load."""
+        import json
+        manager, store = self.open_manager()
+        manager.add_student('John', 'Doe', 'john.doe@example.com')
+        manager.add_student('Jane', 'Smith', 'jane.smith@example.com')
+        john, jane = manager.students
+        john.update_points((600, 0, 0, 0))
+        jane.update_points((600, 0, 0, 0))
+        manager.remove_student(jane.student_id)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            CourseManager(manager).notify_students()
+        self.assertIn('Total 1 student have been notified.', output.getvalue())
+        # A delivery confirmed after the student was removed, as by a concurrent notification run
+        manager.mark_notified(jane, 'Python')
+        store.close()
+        with open(store.journal_path) as file:
+            notified = [json.loads(line)[2] for line in file if json.loads(line)[1] == 'notify']
+        self.assertEqual(notified, [john.student_id])
+        with open(store.journal_path, 'a') as file:
+            file.write(json.dumps([store.sequence + 1, 'notify', jane.student_id, 'Python']) + '\n')
+            file.write(json.dumps([store.sequence + 2, 'points', jane.student_id, 1, 0, 0, 0]) + '\n')
+
+        restored, _ = self.open_manager()
+        self.assertEqual([student.student_id for student in restored.students], [john.student_id])
+        self.assertTrue(restored.students[0].notifications_sent['Python'])
+
+    def test_compaction(self):
+        """Test that the journal is compacted into a snapshot and only the tail is replayed."""
+        manager, store = self.open_manager(snapshot_interval=3)
+        manager.add_student('John', 'Doe', 'john.doe@example.com')
+        john = manager.students[0]
+        john.update_points((1, 0, 0, 0))
+        john.update_points((2, 0, 0, 0))  # Third record triggers a snapshot
+        john.update_points((4, 0, 0, 0))
+        store.close()
+        with open(store.journal_path) as file:
+            self.assertEqual(len(file.readlines()), 1)
+
+        restored, _ = self.open_manager(snapshot_interval=3)
+        student = restored.students[0]
+        self.assertEqual(student.progress['Python'], 7)
+        self.assertEqual(student.submissions['Python'], 3)
+        self.assertEqual(restored.course_totals.enrolled['Python'], 1)
+
+    def test_points_batch_journal(self):
+        """Test that a batch of points is journaled as one record per line and replays to the same state."""
+        manager, store = self.open_manager()
+        manager.add_student('John', 'Doe', 'john.doe@example.com')
+        john_id = manager.students[0].student_id
+        manager.apply_points_batch([f'{john_id} 300 1 0 0', 'bad line', f'{john_id} 300 0 0 0'])
+        store.close()
+        with open(store.journal_path) as file:
+            self.assertEqual(len(file.readlines()), 3)
+        restored, _ = self.open_manager()
+        student = restored.students[0]
+        self.assertEqual(student.progress, {'Python': 600, 'DSA': 1, 'Databases': 0, 'Flask': 0})
+        self.assertEqual(student.submissions, {'Python': 2, 'DSA': 1, 'Databases': 0, 'Flask': 0})
+        self.assertTrue(student.completed_courses['Python'])
+
+    def test_torn_journal_record(self):
+        """Test that an interrupted final journal write is ignored."""
+        manager, store = self.open_manager()
+        manager.add_student('John', 'Doe', 'john.doe@example.com')
+        store.close()
+        with open(store.journal_path, 'a') as file:
+            file.write('[2, "points", 12')
+        restored, restored_store = self.open_manager()
+        self.assertEqual(len(restored.students), 1)
+        self.assertEqual(restored.students[0].progress['Python'], 0)
+        # Records written after recovery are not lost behind the torn one
+        restored.students[0].update_points((5, 0, 0, 0))
+        restored_store.close()
+        again, _ = self.open_manager()
+        self.assertEqual(again.students[0].progress['Python'], 5)
+
+
+class TestCommandProfiler(unittest.TestCase):
+    """Tests for the --profile option."""
+
+    def test_profile_commands(self):
+        """Test that each command and statistics pass is recorded in the profile."""
+        import io
+        import json
+        import pstats
+        import sys
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            profile_path = f'{directory}/profile.json'
+            stats_path = f'{directory}/profile.stats'
+            stdin, stdout = sys.stdin, sys.stdout
+            sys.stdin = io.StringIO('add students\nJohn Doe john.doe@example.com\nback\n'
+                                    'statistics\nback\nnotify\nexit\n')
+            sys.stdout = io.StringIO()
+            try:
+                main(['--profile', profile_path, '--profile-stats', stats_path])
+            finally:
+                sys.stdin, sys.stdout = stdin, stdout
+            with open(profile_path) as file:
+                records = json.load(file)
+            self.assertEqual(records['add students']['calls'], 1)
+            self.assertEqual(records['statistics']['calls'], 1)
+            self.assertEqual(records['notify']['calls'], 1)
+            self.assertEqual(records['determine_course_popularity']['calls'], 1)
+            self.assertGreaterEqual(records['add students']['wall_time'], 0)
+            self.assertIn('allocated_bytes', records['notify'])
+            self.assertTrue(pstats.Stats(stats_path).total_calls > 0)
+        self.assertIsNone(learning_progress_tracker.PROFILER)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file